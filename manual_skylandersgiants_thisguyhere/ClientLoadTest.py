@@ -0,0 +1,282 @@
+"""Load test for the Manual client: a stand-in Archipelago server that speaks just enough of the protocol
+(RoomInfo, Connect/Connected, GetDataPackage/DataPackage, ReceivedItems, LocationChecks, Sync, Bounce, Get/Set/SetNotify),
+driving any number of headless ManualContext instances at once.
+
+    python -m worlds.<this apworld>.ClientLoadTest <file.apmanual> --clients 50 --item-rate 5 --check-rate 1
+
+Each client checks random locations at --check-rate while the server pushes items to it at --item-rate, then everything
+goes quiet for --idle so the bandwidth of an idle client can be measured."""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from typing import Optional
+
+import websockets
+
+import Utils
+from CommonClient import server_loop
+from NetUtils import NetworkItem, NetworkPlayer, NetworkSlot, SlotType, Version, encode, decode
+
+from .ClientReplay import build_data_package, percentile
+from .ManualClient import ManualContext, game_watcher_manual, read_apmanual_file
+
+
+class StandInSlot:
+    """A connected client, as the stand-in server sees it"""
+
+    def __init__(self, slot: int, name: str, socket):
+        self.slot = slot
+        self.name = name
+        self.socket = socket
+        self.received_items: list[NetworkItem] = []
+        self.checked_locations: set[int] = set()
+        self.notify_keys: set[str] = set()
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.packets_in = 0
+
+
+class StandInServer:
+    """Serves a single Manual game to any number of slots. Every slot gets all of the game's locations."""
+
+    def __init__(self, client_data: dict, host: str = "127.0.0.1", port: int = 0, seed: int = 0):
+        self.game = client_data["game"]
+        self.data_package = build_data_package(client_data)
+        self.location_ids = sorted(self.data_package["location_name_to_id"].values())
+        self.item_ids = sorted(self.data_package["item_name_to_id"].values())
+        self.host = host
+        self.port = port
+        self.random = random.Random(seed)
+
+        self.slots: dict[str, StandInSlot] = {}
+        self.stored_data: dict[str, object] = {}
+        self.locations_acknowledged = 0
+        self.websocket_server = None
+
+    @property
+    def address(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    async def start(self):
+        self.websocket_server = await websockets.serve(self.handle_socket, self.host, self.port, ping_interval=None)
+        # with port 0, the system picked a free port
+        self.port = self.websocket_server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self.websocket_server:
+            self.websocket_server.close()
+            await self.websocket_server.wait_closed()
+
+    async def send(self, slot_or_socket, messages: list[dict]):
+        data = encode(messages)
+        if isinstance(slot_or_socket, StandInSlot):
+            slot_or_socket.bytes_out += len(data)
+            slot_or_socket = slot_or_socket.socket
+        await slot_or_socket.send(data)
+
+    async def handle_socket(self, socket, *args):
+        slot: Optional[StandInSlot] = None
+        await self.send(socket, [{
+            "cmd": "RoomInfo", "version": Version(*Utils.version_tuple), "generator_version": Version(*Utils.version_tuple),
+            "tags": [], "password": False, "permissions": {"release": 2, "collect": 2, "remaining": 2},
+            "hint_cost": 0, "location_check_points": 1, "games": [self.game],
+            "datapackage_checksums": {self.game: self.data_package["checksum"]},
+            "seed_name": "stand-in", "time": time.time(),
+        }])
+
+        try:
+            async for data in socket:
+                if slot:
+                    slot.bytes_in += len(data)
+                    slot.packets_in += 1
+                for message in decode(data):
+                    slot = await self.handle_message(socket, slot, message) or slot
+        except websockets.ConnectionClosed:
+            pass
+
+    async def handle_message(self, socket, slot: Optional[StandInSlot], message: dict) -> Optional[StandInSlot]:
+        cmd = message.get("cmd")
+
+        if cmd == "GetDataPackage":
+            await self.send(socket, [{"cmd": "DataPackage", "data": {"games": {self.game: self.data_package}}}])
+        elif cmd == "Connect":
+            name = message["name"]
+            slot = self.slots.get(name)
+            if slot is None:
+                slot = self.slots[name] = StandInSlot(len(self.slots) + 1, name, socket)
+            slot.socket = socket
+            await self.send(slot, [{
+                "cmd": "Connected", "team": 0, "slot": slot.slot,
+                "players": [NetworkPlayer(0, other.slot, other.name, other.name) for other in self.slots.values()],
+                "missing_locations": [id for id in self.location_ids if id not in slot.checked_locations],
+                "checked_locations": sorted(slot.checked_locations), "slot_data": {}, "hint_points": 0,
+                "slot_info": {other.slot: NetworkSlot(other.name, self.game, SlotType.player) for other in self.slots.values()},
+            }, {"cmd": "ReceivedItems", "index": 0, "items": slot.received_items}])
+            return slot
+        elif slot is None:
+            return None
+        elif cmd == "LocationChecks":
+            new_checks = set(message["locations"]) - slot.checked_locations
+            slot.checked_locations |= new_checks
+            self.locations_acknowledged += len(new_checks)
+            if new_checks:
+                await self.send(slot, [{"cmd": "RoomUpdate", "checked_locations": sorted(new_checks)}])
+        elif cmd == "Sync":
+            await self.send(slot, [{"cmd": "ReceivedItems", "index": 0, "items": slot.received_items}])
+        elif cmd == "Bounce":
+            bounced = {**message, "cmd": "Bounced"}
+            await asyncio.gather(*(self.send(other, [bounced]) for other in self.slots.values()))
+        elif cmd == "SetNotify":
+            slot.notify_keys.update(message.get("keys", []))
+        elif cmd == "Get":
+            keys = message.get("keys", [])
+            await self.send(slot, [{**message, "cmd": "Retrieved", "keys": {key: self.stored_data.get(key) for key in keys}}])
+        elif cmd == "Set":
+            key = message["key"]
+            original_value = self.stored_data.get(key, message.get("default"))
+            # only plain replacement is supported, which is all the Manual client uses
+            value = message["operations"][-1]["value"] if message.get("operations") else original_value
+            self.stored_data[key] = value
+            reply = {"cmd": "SetReply", "key": key, "value": value, "original_value": original_value, "slot": slot.slot}
+            await asyncio.gather(*(self.send(other, [reply]) for other in self.slots.values() if key in other.notify_keys))
+        return None
+
+    async def push_items(self, slot: StandInSlot, count: int = 1):
+        items = [NetworkItem(item_id, self.random.choice(self.location_ids), slot.slot, 0)
+                 for item_id in self.random.choices(self.item_ids, k=count)]
+        index = len(slot.received_items)
+        slot.received_items.extend(items)
+        await self.send(slot, [{"cmd": "ReceivedItems", "index": index, "items": items}])
+
+
+class LoadTestClient:
+    """A headless Manual client connected to the stand-in server, timing each of its location checks until the server acknowledges it"""
+
+    def __init__(self, client_data: dict, address: str, name: str):
+        self.ctx = ManualContext(address, None, client_data["game"], name)
+        # like --headless, minus the received items output nobody reads here
+        self.ctx.headless = True
+        self.ctx.headless_output = open(os.devnull, 'w')
+        self.ctx.item_table = client_data.get("items", {})
+        self.ctx.location_table = client_data.get("locations", {})
+        self.ctx.region_table = client_data.get("regions", {})
+        self.ctx.category_table = client_data.get("categories", {})
+
+        self.checked_at: dict[int, float] = {}
+        self.latencies: list[float] = []
+
+        on_package = self.ctx.on_package
+
+        def timed_on_package(cmd: str, args: dict):
+            on_package(cmd, args)
+            if cmd == "RoomUpdate":
+                now = time.perf_counter()
+                for location_id in args.get("checked_locations", []):
+                    if location_id in self.checked_at:
+                        self.latencies.append(now - self.checked_at.pop(location_id))
+
+        self.ctx.on_package = timed_on_package
+
+    def start(self):
+        self.ctx.server_task = asyncio.create_task(server_loop(self.ctx), name="server loop")
+        self.watcher = asyncio.create_task(game_watcher_manual(self.ctx), name="ManualProgressionWatcher")
+
+    def check_random_location(self, rng: random.Random):
+        available = list(self.ctx.missing_locations - self.ctx.locations_checked)
+        if available:
+            location_id = rng.choice(available)
+            self.checked_at[location_id] = time.perf_counter()
+            self.ctx.queue_location_check(location_id)
+
+    async def stop(self):
+        self.ctx.exit_event.set()
+        await self.watcher
+        await self.ctx.shutdown()
+        self.ctx.headless_output.close()
+
+
+async def run_load_test(client_data: dict, clients: int = 10, duration: float = 10.0, idle: float = 5.0,
+                        item_rate: float = 5.0, check_rate: float = 1.0, port: int = 0, seed: int = 0) -> dict:
+    server = StandInServer(client_data, port=port, seed=seed)
+    await server.start()
+    rng = random.Random(seed)
+
+    load_clients = [LoadTestClient(client_data, server.address, f"Load{i + 1}") for i in range(clients)]
+    for client in load_clients:
+        client.start()
+
+    connect_start = time.perf_counter()
+    while any(not client.ctx.slot for client in load_clients):
+        if time.perf_counter() - connect_start > 30:
+            raise TimeoutError("Not every client managed to connect to the stand-in server")
+        await asyncio.sleep(0.05)
+    connect_time = time.perf_counter() - connect_start
+
+    async def drive(client: LoadTestClient, until: float):
+        slot = server.slots[client.ctx.username]
+        next_item = next_check = time.perf_counter()
+        while time.perf_counter() < until:
+            now = time.perf_counter()
+            if item_rate and now >= next_item:
+                await server.push_items(slot)
+                next_item += 1 / item_rate
+            if check_rate and now >= next_check:
+                client.check_random_location(rng)
+                next_check += 1 / check_rate
+            await asyncio.sleep(max(0.0, min(next_item if item_rate else until, next_check if check_rate else until) - time.perf_counter()))
+
+    active_start = time.perf_counter()
+    acknowledged_before = server.locations_acknowledged
+    await asyncio.gather(*(drive(client, active_start + duration) for client in load_clients))
+    # give the last checks a moment to be acknowledged
+    await asyncio.sleep(0.5)
+    active_time = time.perf_counter() - active_start
+    acknowledged = server.locations_acknowledged - acknowledged_before
+    items_delivered = sum(len(client.ctx.items_received) for client in load_clients)
+
+    idle_bytes_before = sum(slot.bytes_in for slot in server.slots.values())
+    idle_packets_before = sum(slot.packets_in for slot in server.slots.values())
+    await asyncio.sleep(idle)
+    idle_bytes = sum(slot.bytes_in for slot in server.slots.values()) - idle_bytes_before
+    idle_packets = sum(slot.packets_in for slot in server.slots.values()) - idle_packets_before
+
+    await asyncio.gather(*(client.stop() for client in load_clients))
+    await server.stop()
+
+    latencies = [latency * 1000 for client in load_clients for latency in client.latencies]
+    return {
+        "clients": clients,
+        "connect_seconds": connect_time,
+        "checks_acknowledged_per_second": acknowledged / active_time,
+        "items_delivered_per_second": items_delivered / active_time,
+        "check_latency_p50_ms": percentile(latencies, 50),
+        "check_latency_p99_ms": percentile(latencies, 99),
+        "checks_unacknowledged": sum(len(client.checked_at) for client in load_clients),
+        "idle_bytes_per_second_per_client": idle_bytes / idle / clients,
+        "idle_packets_per_second_per_client": idle_packets / idle / clients,
+    }
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Load test Manual clients against a stand-in Archipelago server.")
+    parser.add_argument('apmanual_file', help='Path to an APMANUAL file of the game to serve')
+    parser.add_argument('--clients', type=int, default=10)
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds of checking locations and receiving items')
+    parser.add_argument('--idle', type=float, default=5.0, help='Seconds of doing nothing, to measure idle bandwidth')
+    parser.add_argument('--item-rate', type=float, default=5.0, help='Items pushed to each client per second')
+    parser.add_argument('--check-rate', type=float, default=1.0, help='Locations checked by each client per second')
+    parser.add_argument('--port', type=int, default=0, help='Port of the stand-in server (0 picks a free one)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    client_data = read_apmanual_file(args.apmanual_file)
+    results = asyncio.run(run_load_test(client_data, args.clients, args.duration, args.idle,
+                                        args.item_rate, args.check_rate, args.port, args.seed))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
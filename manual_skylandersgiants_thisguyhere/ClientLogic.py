@@ -0,0 +1,283 @@
+import math
+import re
+from collections import Counter
+from typing import Any, Callable, Iterable, Optional
+
+
+class LogicRule:
+    """A compiled requires, along with the items and categories it reads, so it only gets checked again when one of them changes"""
+
+    def __init__(self, check: Callable[["ManualLogic"], bool], item_names: Iterable[str] = (), category_names: Iterable[str] = ()):
+        self.check = check
+        self.item_names = frozenset(item_names)
+        self.category_names = frozenset(category_names)
+
+    def depends_on(self, item_names: set[str], category_names: set[str]) -> bool:
+        return not (self.item_names.isdisjoint(item_names) and self.category_names.isdisjoint(category_names))
+
+
+ALWAYS_TRUE = LogicRule(lambda logic: True)
+# for the requires functions that can't be worked out without the world, so what they guard is never shown as reachable by mistake
+UNKNOWN = LogicRule(lambda logic: False)
+
+
+class ManualLogic:
+    """Tracks which locations are in logic from the data of an .apmanual file (items, locations, regions and categories)
+    and the items received so far, without needing the apworld or a generation like Universal Tracker.\n
+    Requires are compiled once. When items are received, only the rules reading those items (or their categories) are checked again.
+    Regions are connected the way generation left them when those connections are given (from the slot data),
+    otherwise the way they are in regions.json.
+    Counts like "all", "half" or "50%" are taken from the item counts generation ended up with when the slot data has them,
+    otherwise from the counts in items.json.\n
+    Requires functions can't run without the world: YamlEnabled/YamlDisabled read the slot data options,
+    OptOne/OptAll are treated as the requires they wrap, and any other function (like hook functions or ItemValue) is unknown,
+    which never counts as satisfied."""
+
+    def __init__(self, items: dict[str, dict], locations: dict[str, dict], regions: dict[str, dict],
+                 slot_data: Optional[dict] = None, connections: Optional[dict[str, list[str]]] = None):
+        self.items = items
+        self.locations = locations
+        self.regions = regions
+        self.slot_data = slot_data or {}
+        self.item_totals: Optional[dict[str, int]] = self.slot_data.get("item_counts")
+        self.connections = connections if connections is not None \
+            else {name: region.get("connects_to") or [] for name, region in regions.items()}
+
+        self.category_items: dict[str, list[str]] = {}
+        for item_name, item in items.items():
+            for category in item.get("category") or []:
+                self.category_items.setdefault(category, []).append(item_name)
+
+        self.item_counts: Counter[str] = Counter()
+        self.category_counts: Counter[str] = Counter()
+
+        self.compiled_rules: dict[str, LogicRule] = {}
+        self.region_rules = {name: self.compile(region.get("requires", "")) for name, region in regions.items()}
+        self.entrance_rules = {(from_name, to_name): self.compile(requires)
+                               for to_name, region in regions.items()
+                               for from_name, requires in (region.get("entrance_requires") or {}).items()}
+        self.entrance_rules.update({(from_name, to_name): self.compile(requires)
+                                    for from_name, region in regions.items()
+                                    for to_name, requires in (region.get("exit_requires") or {}).items()})
+        self.location_rules = {name: self.compile(location.get("requires", "")) for name, location in locations.items()}
+
+        if connections is not None:
+            # the Manual region is where generation starts, and connects to the starting regions
+            self.starting_regions = [name for name in connections.get("Manual", []) if name in regions]
+        else:
+            self.starting_regions = [name for name, region in regions.items() if region.get("starting")] or list(regions)
+
+        self.rule_results: dict[int, bool] = {}
+        self.reachable_regions: set[str] = set()
+        self.reachable_locations: set[str] = set()
+        self.update_reachability()
+
+    def compile(self, requires: str | list) -> LogicRule:
+        """Returns the compiled rule for a requires. Identical requires share the same rule."""
+        if not requires:
+            return ALWAYS_TRUE
+
+        key = requires if isinstance(requires, str) else repr(requires)
+        rule = self.compiled_rules.get(key)
+        if rule is None:
+            if isinstance(requires, str):
+                rule = self.compile_string(requires)
+            else:
+                rule = self.compile_list(requires)
+            self.compiled_rules[key] = rule
+        return rule
+
+    def compile_list(self, requires: list) -> LogicRule:
+        required: list[tuple[str, int]] = []
+        groups: list[list[tuple[str, int]]] = []
+
+        for entry in requires:
+            if isinstance(entry, dict) and isinstance(entry.get("or"), list):
+                groups.append([self.parse_count(item) for item in entry["or"]])
+            elif isinstance(entry, list):
+                groups.append([self.parse_count(item) for item in entry])
+            else:
+                required.append(self.parse_count(entry))
+
+        def check(logic: "ManualLogic") -> bool:
+            if all(logic.item_counts[name] >= count for name, count in required):
+                return True
+            return any(all(logic.item_counts[name] >= count for name, count in group) for group in groups)
+
+        item_names = {name for name, _ in required} | {name for group in groups for name, _ in group}
+        return LogicRule(check, item_names)
+
+    @staticmethod
+    def parse_count(item: str) -> tuple[str, int]:
+        item_parts = item.split(":")
+        if len(item_parts) > 1:
+            return item_parts[0], int(item_parts[1])
+        return item, 1
+
+    _token_pattern = re.compile(r"\|[^|]+\||\{\w+\(.*?\)\}|\(|\)|\band\b|\bor\b", re.IGNORECASE)
+
+    def compile_string(self, requires: str) -> LogicRule:
+        tokens = self._token_pattern.findall(requires)
+        item_names: set[str] = set()
+        category_names: set[str] = set()
+        position = 0
+
+        # AND and OR have the same precedence and are read left to right, like the generation side does
+        def parse_expression() -> Callable[["ManualLogic"], bool]:
+            nonlocal position
+            check = parse_operand()
+            while position < len(tokens) and tokens[position].lower() in ("and", "or"):
+                operator = tokens[position].lower()
+                position += 1
+                left, right = check, parse_operand()
+                if operator == "and":
+                    check = lambda logic, left=left, right=right: left(logic) and right(logic)
+                else:
+                    check = lambda logic, left=left, right=right: left(logic) or right(logic)
+            return check
+
+        def parse_operand() -> Callable[["ManualLogic"], bool]:
+            nonlocal position
+            if position >= len(tokens):
+                raise ValueError(f"Unexpected end of requires: {requires}")
+
+            token = tokens[position]
+            position += 1
+            if token == "(":
+                check = parse_expression()
+                if position < len(tokens) and tokens[position] == ")":
+                    position += 1
+                return check
+            if token.startswith("{"):
+                rule = self.compile_function(token)
+                item_names.update(rule.item_names)
+                category_names.update(rule.category_names)
+                return rule.check
+            if token.startswith("|"):
+                return compile_item(token)
+            raise ValueError(f"Unexpected '{token}' in requires: {requires}")
+
+        def compile_item(token: str) -> Callable[["ManualLogic"], bool]:
+            is_category = token.startswith("|@")
+            item = token.lstrip("|@$").rstrip("|")
+            item_name, _, item_count = item.partition(":")
+            item_name = item_name.strip()
+            item_count = item_count.strip() or "1"
+
+            if is_category:
+                category_names.add(item_name)
+                total = sum(self.get_item_total(name) for name in self.category_items.get(item_name, []))
+                required = self.resolve_count(item_count, total)
+                return lambda logic: logic.category_counts[item_name] >= required
+
+            item_names.add(item_name)
+            required = self.resolve_count(item_count, self.get_item_total(item_name))
+            return lambda logic: logic.item_counts[item_name] >= required
+
+        if not tokens:
+            return ALWAYS_TRUE
+
+        check = parse_expression()
+        return LogicRule(check, item_names, category_names)
+
+    def get_item_total(self, item_name: str) -> int:
+        """Returns how many of an item there are to count towards "all", "half" or a percentage"""
+        if self.item_totals is not None:
+            return int(self.item_totals.get(item_name, 0))
+        return int(self.items.get(item_name, {}).get("count", 1))
+
+    @staticmethod
+    def resolve_count(item_count: str, total: int) -> int:
+        if item_count.lower() == "all":
+            return total
+        if item_count.lower() == "half":
+            return int(total / 2)
+        if item_count.endswith("%") and len(item_count) > 1:
+            percent = min(max(float(item_count[:-1]) / 100, 0), 1)
+            return math.ceil(total * percent)
+        return int(item_count)
+
+    def compile_function(self, token: str) -> LogicRule:
+        func_name, args = re.match(r"\{(\w+)\((.*?)\)\}", token).groups()
+
+        if func_name in ("YamlEnabled", "YamlDisabled"):
+            value = self.slot_data.get(args.strip())
+            if value is None:
+                return UNKNOWN
+            result = bool(value) == (func_name == "YamlEnabled")
+            return LogicRule(lambda logic: result)
+
+        if func_name == "OptOne":
+            item = args.split(",")[0].strip()
+            return self.compile(item if item.startswith("|") else f"|{item}|")
+
+        if func_name == "OptAll":
+            return self.compile(args)
+
+        return UNKNOWN
+
+    def add_items(self, item_names: Iterable[str]) -> set[str]:
+        """Counts the received items and returns the names of the locations whose reachability changed"""
+        changed_items: set[str] = set()
+        changed_categories: set[str] = set()
+
+        for item_name in item_names:
+            self.item_counts[item_name] += 1
+            changed_items.add(item_name)
+            for category in self.items.get(item_name, {}).get("category") or []:
+                self.category_counts[category] += 1
+                changed_categories.add(category)
+
+        for rule in self.compiled_rules.values():
+            if id(rule) in self.rule_results and rule.depends_on(changed_items, changed_categories):
+                del self.rule_results[id(rule)]
+
+        return self.update_reachability()
+
+    def reset(self) -> set[str]:
+        """Forgets every received item, like when the server sends the whole item list again"""
+        self.item_counts.clear()
+        self.category_counts.clear()
+        self.rule_results.clear()
+        return self.update_reachability()
+
+    def evaluate(self, rule: LogicRule) -> bool:
+        result = self.rule_results.get(id(rule))
+        if result is None:
+            result = self.rule_results[id(rule)] = rule.check(self)
+        return result
+
+    def update_reachability(self) -> set[str]:
+        """Works out the reachable regions and locations again, reusing every rule result that's still valid.
+        Returns the names of the locations whose reachability changed."""
+        reachable_regions = {name for name in self.starting_regions if self.evaluate(self.region_rules[name])}
+        queue = list(reachable_regions)
+
+        while queue:
+            region_name = queue.pop()
+            for connected_name in self.connections.get(region_name, []):
+                if connected_name in reachable_regions or connected_name not in self.regions:
+                    continue
+                entrance_rule = self.entrance_rules.get((region_name, connected_name), ALWAYS_TRUE)
+                if self.evaluate(self.region_rules[connected_name]) and self.evaluate(entrance_rule):
+                    reachable_regions.add(connected_name)
+                    queue.append(connected_name)
+
+        reachable_locations = {name for name, location in self.locations.items()
+                               # locations outside of the regions in regions.json (like in the "Manual" region) only need their own requires
+                               if (location.get("region") not in self.regions or location["region"] in reachable_regions)
+                               and self.evaluate(self.location_rules[name])}
+
+        changed = reachable_locations ^ self.reachable_locations
+        self.reachable_regions = reachable_regions
+        self.reachable_locations = reachable_locations
+        return changed
+
+
+def create_manual_logic(client_data: dict[str, Any], slot_data: Optional[dict] = None) -> Optional[ManualLogic]:
+    """Builds the local logic from the data of an .apmanual file and the region connections in the slot data (if any),
+    or returns None if the file doesn't have what it needs"""
+    if not client_data.get("locations") or not client_data.get("regions"):
+        return None
+    return ManualLogic(client_data.get("items", {}), client_data["locations"], client_data["regions"], slot_data,
+                       (slot_data or {}).get("region_connections"))
@@ -0,0 +1,232 @@
+"""Replays a recorded (or synthetic) sequence of server packets into the Manual client, without a live server,
+and times the tracker build/update done for every packet.
+
+Recorded sessions are JSON lines of server messages, exactly as they come over the websocket
+(each line is a list of commands, or a single command), so they can be captured from any real session.
+
+    python -m worlds.<this apworld>.ClientReplay <file.apmanual> [session.jsonl] [--synthetic-items 5000]
+
+The tracker is built with Kivy widgets, so this has to run somewhere the client's GUI could run."""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Optional
+
+from NetUtils import NetworkItem, NetworkPlayer, NetworkSlot, SlotType, decode
+from CommonClient import process_server_cmd
+
+from .ManualClient import ManualContext, get_context_class, read_apmanual_file
+
+
+class ReplaySocket:
+    """Stands in for the server's websocket, keeping whatever the client sends"""
+    open = True
+    closed = False
+
+    def __init__(self):
+        self.sent: list[str] = []
+
+    async def send(self, data: str):
+        self.sent.append(data)
+
+
+class ReplayEndpoint:
+    def __init__(self):
+        self.socket = ReplaySocket()
+
+
+def build_data_package(client_data: dict) -> dict:
+    """Builds the game's data package from the ids in the .apmanual data"""
+    return {
+        "item_name_to_id": {name: item["id"] for name, item in client_data.get("items", {}).items() if "id" in item},
+        "location_name_to_id": {name: location["id"] for name, location in client_data.get("locations", {}).items() if "id" in location},
+        "checksum": "replay",
+    }
+
+
+def get_victory_names(client_data: dict) -> list[str]:
+    return [name for name, location in client_data.get("locations", {}).items() if location.get("victory")] \
+        or ["__Manual Game Complete__"]
+
+
+def load_recorded_session(path: str) -> list[dict]:
+    """Reads a recorded session, one websocket message (a command or a list of commands) per line"""
+    packets = []
+    with open(path, 'r') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            message = decode(line)
+            packets.extend(message if isinstance(message, list) else [message])
+    return packets
+
+
+def generate_synthetic_session(client_data: dict, item_count: int = 5000, batch_size: int = 10, check_every: int = 5,
+                               hint_every: int = 0, slot_data: Optional[dict] = None, seed: int = 0) -> list[dict]:
+    """Makes up a session for stress testing: a Connected, then item_count received items in batches of batch_size.
+    Every check_every batches a location is checked, and every hint_every batches (if set) a location gets hinted."""
+    rng = random.Random(seed)
+    player_name = client_data.get("player_name") or "Player"
+    item_ids = [item["id"] for item in client_data.get("items", {}).values() if "id" in item]
+    item_flags = {item["id"]: 0b001 if item.get("progression") else 0 for item in client_data.get("items", {}).values() if "id" in item}
+    missing_locations = sorted(location["id"] for location in client_data.get("locations", {}).values() if "id" in location)
+    rng.shuffle(missing_locations)
+
+    packets: list[dict] = [{
+        "cmd": "Connected", "team": 0, "slot": 1,
+        "players": [NetworkPlayer(0, 1, player_name, player_name)],
+        "missing_locations": list(missing_locations), "checked_locations": [],
+        "slot_data": slot_data or {}, "hint_points": 0,
+        "slot_info": {1: NetworkSlot(player_name, client_data["game"], SlotType.player)},
+    }]
+
+    hints = []
+    for batch_number, index in enumerate(range(0, item_count, batch_size), 1):
+        items = [NetworkItem(item_id, rng.choice(missing_locations) if missing_locations else 0, 1, item_flags[item_id])
+                 for item_id in rng.choices(item_ids, k=min(batch_size, item_count - index))]
+        packets.append({"cmd": "ReceivedItems", "index": index, "items": items})
+
+        if check_every and batch_number % check_every == 0 and missing_locations:
+            packets.append({"cmd": "RoomUpdate", "checked_locations": [missing_locations.pop()]})
+
+        if hint_every and batch_number % hint_every == 0 and missing_locations:
+            hints.append({"receiving_player": 1, "finding_player": 1, "location": rng.choice(missing_locations),
+                          "item": rng.choice(item_ids), "found": False, "entrance": "", "item_flags": 0})
+            packets.append({"cmd": "SetReply", "key": "_read_hints_0_1", "value": list(hints), "original_value": hints[:-1],
+                            "slot": 1})
+
+    return packets
+
+
+def percentile(values: list[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))]
+
+
+class ReplayStats:
+    """Durations (in seconds), net change in allocated memory blocks and peak traced memory, for every call of each timed phase.\n
+    The block delta is what's still allocated once the call returns (sys.getallocatedblocks), not how many allocations it made."""
+
+    def __init__(self):
+        self.phases: dict[str, list[tuple[float, int, int]]] = {}
+
+    def measure(self, phase: str, func: Callable, *args, **kwargs) -> Any:
+        blocks_before = sys.getallocatedblocks()
+        memory_before = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] - memory_before if tracemalloc.is_tracing() else 0
+            self.phases.setdefault(phase, []).append((elapsed, sys.getallocatedblocks() - blocks_before, peak))
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        summary = {}
+        for phase, samples in self.phases.items():
+            durations = [sample[0] * 1000 for sample in samples]
+            summary[phase] = {
+                "calls": len(samples),
+                "p50_ms": percentile(durations, 50),
+                "p99_ms": percentile(durations, 99),
+                "max_ms": max(durations),
+                "mean_net_blocks": sum(sample[1] for sample in samples) / len(samples),
+                "max_peak_kib": max(sample[2] for sample in samples) / 1024,
+            }
+        return summary
+
+
+def create_replay_context(client_data: dict) -> ManualContext:
+    """Sets up a client as if it had just authenticated with a server, with its GUI built but not running"""
+    ctx = get_context_class()(None, None, client_data["game"], client_data.get("player_name"))
+    ctx.item_table = client_data.get("items", {})
+    ctx.location_table = client_data.get("locations", {})
+    ctx.region_table = client_data.get("regions", {})
+    ctx.category_table = client_data.get("categories", {})
+    # also sets the client's own name/id lookups, since it's the client's game
+    ctx.update_data_package({"games": {ctx.game: build_data_package(client_data)}})
+
+    ctx.victory_names = get_victory_names(client_data)
+    ctx.goal_location = ctx.get_location_by_name(ctx.victory_names[0])
+
+    ctx.server = ReplayEndpoint()
+    ctx.auth = client_data.get("player_name") or "Player"
+
+    ctx.ui = ctx.make_gui()(ctx)
+    ctx.ui.build()
+    return ctx
+
+
+async def replay_session(client_data: dict, packets: list[dict], stats: Optional[ReplayStats] = None) -> ReplayStats:
+    """Feeds every packet through the client's packet handling, then runs the tracker update it requested right away"""
+    stats = stats or ReplayStats()
+    ctx = create_replay_context(client_data)
+    ui = ctx.ui
+
+    build = ui.build_tracker_and_locations_table
+    update = ui.update_tracker_and_locations_table
+    ui.build_tracker_and_locations_table = lambda *args, **kwargs: stats.measure("build", build, *args, **kwargs)
+    ui.update_tracker_and_locations_table = lambda *args, **kwargs: stats.measure("update", update, *args, **kwargs)
+
+    for packet in packets:
+        start = time.perf_counter()
+        await process_server_cmd(ctx, packet)
+        if packet["cmd"] == "SetReply" and packet.get("key", "").startswith("_read_hints_"):
+            ui.update_hints()
+        ui.check_for_requested_update(force=True)
+
+        elapsed = time.perf_counter() - start
+        stats.phases.setdefault("packet", []).append((elapsed, 0, 0))
+        stats.phases.setdefault(f"packet:{packet['cmd']}", []).append((elapsed, 0, 0))
+
+    return stats
+
+
+def print_summary(summary: dict[str, dict[str, float]]):
+    print(f"{'phase':<24}{'calls':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'net blocks':>12}{'peak KiB':>10}")
+    for phase, values in summary.items():
+        print(f"{phase:<24}{values['calls']:>8}{values['p50_ms']:>10.2f}{values['p99_ms']:>10.2f}{values['max_ms']:>10.2f}"
+              f"{values['mean_net_blocks']:>12.0f}{values['max_peak_kib']:>10.1f}")
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Replay server packets into the Manual client and time its tracker updates.")
+    parser.add_argument('apmanual_file', help='Path to the APMANUAL file of the slot being replayed')
+    parser.add_argument('session', nargs="?", default=None, help='Recorded session (JSON lines). Without it, a synthetic session is made up')
+    parser.add_argument('--synthetic-items', type=int, default=5000, help='Items received in the synthetic session')
+    parser.add_argument('--batch-size', type=int, default=10, help='Items per ReceivedItems packet in the synthetic session')
+    parser.add_argument('--hint-every', type=int, default=0, help='Add a hint every this many synthetic batches (0 for none)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--tracemalloc', action='store_true', help='Also trace peak memory per call (slows everything down)')
+    parser.add_argument('--json', action='store_true', help='Print the summary as JSON')
+    args = parser.parse_args(argv)
+
+    client_data = read_apmanual_file(args.apmanual_file)
+    if args.session:
+        packets = load_recorded_session(args.session)
+    else:
+        packets = generate_synthetic_session(client_data, args.synthetic_items, args.batch_size,
+                                             hint_every=args.hint_every, seed=args.seed)
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    stats = asyncio.run(replay_session(client_data, packets))
+    if args.tracemalloc:
+        tracemalloc.stop()
+
+    if args.json:
+        print(json.dumps(stats.summary(), indent=2))
+    else:
+        print_summary(stats.summary())
+
+
+if __name__ == '__main__':
+    main()
@@ -273,15 +273,20 @@ class DataValidation():
         # compare whats available vs requested but only if there's anything requested
         if values_requested:
             errors = []
-            existing_items = [item for item in get_items_for_player(multiworld, player, True) if
-                              item.code is not None and ItemClassification.progression in item.classification]
+            value_cache = getattr(world, 'item_value_cache', None)
+            if value_cache is None:
+                existing_items = [item for item in get_items_for_player(multiworld, player, True) if
+                                  item.code is not None and ItemClassification.progression in item.classification]
             for value, val_count in values_requested.items():
-                items_value = get_items_with_value(world, multiworld, value, player)
-                found_count = 0
-                if items_value:
-                    for item in existing_items:
-                        if item.name in items_value:
-                            found_count += items_value[item.name]
+                if value_cache is not None:
+                    found_count = value_cache.get_progression_total(value)
+                else:
+                    items_value = get_items_with_value(world, multiworld, value, player)
+                    found_count = 0
+                    if items_value:
+                        for item in existing_items:
+                            if item.name in items_value:
+                                found_count += items_value[item.name]
 
                 if found_count < val_count:
                     errors.append(f"   '{value}': {found_count} out of the {val_count} {value} worth of progression items required can be found.")
@@ -423,18 +428,19 @@ class DataValidation():
 
     @staticmethod
     def checkForNonStartingRegionsThatAreUnreachable():
-        using_starting_regions = len([region for region in DataValidation.region_table if DataValidation.region_table[region].get("starting")]) > 0
+        from .RegionGraph import RegionGraph
 
-        if not using_starting_regions:
-            return
+        starting_regions = [region for region in DataValidation.region_table if DataValidation.region_table[region].get("starting")]
 
-        nonstarting_regions = [region for region in DataValidation.region_table if not DataValidation.region_table[region].get("starting")]
+        if not starting_regions:
+            return
 
-        for nonstarter in nonstarting_regions:
-            regions_that_connect_to = [region for region in DataValidation.region_table if "connects_to" in DataValidation.region_table[region] and nonstarter in DataValidation.region_table[region]["connects_to"]]
+        graph = RegionGraph.from_region_table(DataValidation.region_table)
+        unreachable_regions = graph.unreachable_from(starting_regions)
 
-            if len(regions_that_connect_to) == 0:
-                raise ValidationError("The region '%s' is set as a non-starting region, but has no regions that connect to it. It will be inaccessible." % nonstarter)
+        for nonstarter in DataValidation.region_table:
+            if nonstarter in unreachable_regions:
+                raise ValidationError("The region '%s' is set as a non-starting region, but cannot be reached from any starting region. It will be inaccessible." % nonstarter)
 
 
 def runPreFillDataValidation(world: World, multiworld: MultiWorld):
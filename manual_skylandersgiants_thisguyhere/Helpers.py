@@ -1,12 +1,14 @@
 import ast
+import copy
 import csv
 import os
 import pkgutil
 import json
 
-from BaseClasses import MultiWorld, Item
+from BaseClasses import MultiWorld, Item, CollectionState
+from collections import Counter
 from enum import IntEnum
-from typing import Optional, List, TYPE_CHECKING, Union, get_args, get_origin, Any
+from typing import Callable, Optional, List, TYPE_CHECKING, Union, get_args, get_origin, Any
 from types import GenericAlias
 from worlds.AutoWorld import World
 from .hooks.Helpers import before_is_category_enabled, before_is_item_enabled, before_is_location_enabled
@@ -47,6 +49,23 @@ def get_option_value(multiworld: MultiWorld, player: int, name: str) -> Union[in
 
     return option.value
 
+def _passthrough_reference(value, *args):
+    return value
+
+def passthrough_hook(hook: Callable) -> Callable:
+    """Marks a hook as doing nothing but returning its first argument, so its caller can skip calling it.\n
+    Raises an Exception if the hook does anything else, remove the decorator from a hook as soon as you add code to it."""
+    code = getattr(hook, "__code__", None)
+    reference = _passthrough_reference.__code__
+    if code is None or code.co_argcount < 1 or code.co_code != reference.co_code or code.co_consts != reference.co_consts:
+        raise Exception(f"@passthrough_hook was used on '{getattr(hook, '__name__', hook)}' but it does more than return its first argument. Remove the decorator from it.")
+    hook.manual_passthrough = True
+    return hook
+
+def is_passthrough_hook(hook: Callable) -> bool:
+    """Check if a hook is marked with @passthrough_hook, in which case the caller can skip calling it"""
+    return getattr(hook, "manual_passthrough", False)
+
 def clamp(value, min, max):
     """Returns value clamped to the inclusive range of min and max"""
     if value < min:
@@ -125,82 +144,74 @@ def _is_manualobject_enabled(multiworld: MultiWorld, player: int, object: Any) -
 
 def get_items_for_player(multiworld: MultiWorld, player: int, includePrecollected: bool = False) -> List[Item]:
     """Return list of items of a player including placed items"""
+    item_index = getattr(multiworld.worlds[player], "item_index", None)
+    if item_index is not None:
+        return item_index.get_items(includePrecollected)
+
+    #Before create_items or for non-Manual worlds
     items = [i for i in multiworld.get_items() if i.player == player]
     if includePrecollected:
         items.extend(multiworld.precollected_items.get(player, []))
     return items
 
+def _get_item_value_cache(world: World, player: int):
+    """Internal method: Returns the ItemValueCache of the player's world, or None if it was not built yet"""
+    player_world = world if player == world.player else world.multiworld.worlds[player]
+    return getattr(player_world, 'item_value_cache', None)
+
 def reset_specific_item_value_cache_for_player(world: World, value: str, player: Optional[int] = None) -> dict[str, int]:
     if player is None:
         player = world.player
-    return world.item_values[player].pop(value, {})
+    cache = _get_item_value_cache(world, player)
+    if cache is None:
+        return {}
+    return cache.invalidate(value)
 
 def reset_item_value_cache_for_player(world: World, player: Optional[int] = None):
     if player is None:
         player = world.player
-    world.item_values[player] = {}
+    cache = _get_item_value_cache(world, player)
+    if cache is not None:
+        cache.invalidate()
 
 def get_items_with_value(world: World, multiworld: MultiWorld, value: str, player: Optional[int] = None, skipCache: bool = False) -> dict[str, int]:
     """Return a dict of every items with a specific value type present in their respective 'value' dict\n
     Output in the format 'Item Name': 'value count'\n
-    Keep a cache of the result, it can be skipped with 'skipCache == True'\n
-    To force a Reset of the player's cache of a value use either reset_specific_item_value_cache_for_player or reset_item_value_cache_for_player
+    The result comes from the player's ItemValueCache (world.item_value_cache), which follows the player's item_index as items are added or removed.
+    It can still be skipped with 'skipCache == True'
     """
     if player is None:
         player = world.player
 
+    value = value.lower().strip()
+
+    cache = _get_item_value_cache(world, player)
+    if cache is not None and not skipCache:
+        return cache.get_items_with_value(value)
+
     player_items = get_items_for_player(multiworld, player, True)
     # Just a small check to prevent caching {} if items don't exist yet
     if not player_items:
         return {value: -1}
 
-    value = value.lower().strip()
-
-    if not skipCache:
-        if not hasattr(world, 'item_values'): #Cache of just the item values
-            world.item_values = {}
-
-        if not world.item_values.get(player):
-            world.item_values[player] = {}
-
-    if value not in world.item_values.get(player, {}).keys() or skipCache:
-        item_with_values = {i.name: world.item_name_to_item[i.name]['value'].get(value, 0)
-                            for i in player_items if i.code is not None
-                            and i.name in world.item_name_groups.get(f'has_{value}_value', [])}
-        if skipCache:
-            return item_with_values
-        world.item_values[player][value] = item_with_values
-    return world.item_values[player].get(value)
+    return {i.name: world.item_name_to_item[i.name]['value'].get(value, 0)
+            for i in player_items if i.code is not None
+            and i.name in world.item_name_groups.get(f'has_{value}_value', [])}
 
 
 def filter_used_regions(player_regions: dict|list) -> set:
     """Return a set of regions that are actually used in Generation. It includes region that have no locations but are required by other regions\n
     The dict version of the player_regions must be in the format: dict(region name str: region)
     """
-    used_regions = set()
+    from .RegionGraph import RegionGraph
 
     if isinstance(player_regions, list):
         player_regions = {r.name: r for r in player_regions}
 
-    #Grab all the player's regions and take note of those with locations
-    for region in player_regions.values():
-        if region.locations:
-            used_regions.add(region)
-
-    #Check every known region with location for parent regions
-    checked_parent = []
-    for region in set(used_regions):
-        def checkParent(parent_region):
-            if parent_region.name in checked_parent: #dont check a region twice
-                return
-            checked_parent.append(parent_region.name)
-            used_regions.add(parent_region)
-            for entrance in parent_region.entrances:
-                if player_regions.get(entrance.parent_region.name):
-                    checkParent(entrance.parent_region)
-            return
-        checkParent(region)
-    return used_regions
+    #Every region with locations is used, and so is every region leading to one of them
+    graph = RegionGraph.from_regions(player_regions.values())
+    regions_with_locations = [name for name, region in player_regions.items() if region.locations]
+    return {player_regions[name] for name in graph.ancestors_of(regions_with_locations) if name in player_regions}
 
 def convert_to_long_string(input: str | list[str]) -> str:
     """Verify that the input is a str. If it's a list[str] then it combine them into a str in a way that works with yaml template/website options descriptions"""
@@ -232,6 +243,38 @@ def format_state_prog_items_key(category: str|ProgItemsCat ,key: str) -> str:
 
     return f"MANUAL_{cat_key}_{format_to_valid_identifier(key.lower())}"
 
+def get_state_version(state: CollectionState, player: int) -> int:
+    """Returns how many times the player's items in this state have changed.
+    A state that was never changed (or was just copied) is at version 0."""
+    versions = getattr(state, "manual_state_versions", None)
+    return versions[player] if versions else 0
+
+def bump_state_version(state: CollectionState, player: int):
+    """Marks the player's items in this state as changed, so results cached against the old version are no longer used"""
+    versions = getattr(state, "manual_state_versions", None)
+    if versions is None:
+        versions = state.manual_state_versions = Counter()
+    versions[player] += 1
+
+    memos = getattr(state, "manual_rule_memos", None)
+    if memos:
+        memos.pop(player, None)
+
+def get_state_rule_memo(state: CollectionState, player: int) -> dict[int, bool]:
+    """Returns the access rule results memoized on this state for the player, keyed by rule id.
+    It's emptied every time the player's items in the state change, and a copied state starts with an empty one."""
+    memos = getattr(state, "manual_rule_memos", None)
+    if memos is None:
+        memos = state.manual_rule_memos = {}
+    memo = memos.get(player)
+    if memo is None:
+        memo = memos[player] = {}
+    return memo
+
+_type_converters: dict[Any, Callable[[str], Any]] = {}
+_literal_conversions: dict[tuple[Any, str], tuple[bool, Any]] = {}
+_immutable_types = (type(None), bool, int, float, complex, str, bytes, tuple, frozenset)
+
 def convert_string_to_type(input: str, target_type: type) -> Any:
     """Take a string and attempt to convert it to {target_type}
     \ntarget_type can be a single type(ex. str), an union (int|str), an Optional type (Optional[str]) or a combo of any of those (Optional[int|str])
@@ -240,7 +283,21 @@ def convert_string_to_type(input: str, target_type: type) -> Any:
     - When target_type contains bool: it will check if input.lower() is "true", "1", "false" or "0"
     - If bool is the last type in target_type it also run the input directly through bool(input) if previous fails
     \nif you want this to possibly fail without Exceptions include str in target_type, your input should get returned if all the other conversions fails
+    \nThe analysis of target_type is only done once per type and literal parsing (for list, dict, etc.) once per input, both are cached after that.
     """
+    try:
+        converter = _type_converters.get(target_type)
+    except TypeError: #unhashable target_type, can't be cached
+        return _compile_type_converter(target_type)(input)
+
+    if converter is None:
+        converter = _compile_type_converter(target_type)
+        _type_converters[target_type] = converter
+
+    return converter(input)
+
+def _compile_type_converter(target_type: type) -> Callable[[str], Any]:
+    """Internal method: Analyse target_type once and return a function that converts a string to it, see convert_string_to_type"""
     def checktype(target_type, found_types: list):
         if issubclass(type(target_type), type): #is it a single type (str, list, etc)
             if target_type not in found_types:
@@ -256,7 +313,7 @@ def convert_string_to_type(input: str, target_type: type) -> Any:
                 checktype(arg, found_types)
 
         else:
-            raise Exception(f"'{value}' cannot be converted to {target_type} since its not a supported type \nAsk about it in #Manual-support and it might be added.")
+            raise Exception(f"'{target_type}' is not a supported type to convert to \nAsk about it in #Manual-support and it might be added.")
 
     found_types = []
     checktype(target_type, found_types)
@@ -265,30 +322,10 @@ def convert_string_to_type(input: str, target_type: type) -> Any:
         found_types.remove(str)
         found_types.append(str)
 
-    value = input.strip()
-    i = 0
-    errors = []
-    for value_type in found_types:
-        i += 1
-        if issubclass(value_type, type(None)):
-            if value.lower() == 'none':
-                return None
-            errors.append(str(value_type) + ": value was not 'none'")
-
-        elif issubclass(value_type, bool):
-            if value.lower() in ['true', '1', 'on']:
-                return True
-
-            elif value.lower() in ['false', '0', 'off']:
-                return False
-
-            else:
-                if i == len(found_types):
-                    return value_type(value) #if its the last type might as well try and convert to bool
-                errors.append(str(value_type) + ": value was not in either ['true', '1', 'on'] or ['false', '0', 'off']")
-
-        elif issubclass(value_type, list) or issubclass(value_type, dict) \
-            or issubclass(value_type, set) or issubclass(type(value_type), GenericAlias):
+    def convert_literal(value: str, value_type) -> tuple[bool, Any]:
+        """Returns (True, converted value) or (False, error message), the result is cached per value_type and value"""
+        key = (value_type, value)
+        if key not in _literal_conversions:
             try:
                 try:
                     converted_value = ast.literal_eval(value)
@@ -300,19 +337,55 @@ def convert_string_to_type(input: str, target_type: type) -> Any:
 
                 compareto = get_origin(value_type) if issubclass(type(value_type), GenericAlias) else value_type
                 if issubclass(compareto, type(converted_value)):
-                    return converted_value
+                    _literal_conversions[key] = (True, converted_value)
                 else:
-                    errors.append(str(value_type) + f": value '{value}' was not a valid {str(compareto)}")
+                    _literal_conversions[key] = (False, str(value_type) + f": value '{value}' was not a valid {str(compareto)}")
             except Exception as e:
-                errors.append(str(value_type) + ": " + str(e))
-                continue
-        else:
-            try:
-                return value_type(value)
+                _literal_conversions[key] = (False, str(value_type) + ": " + str(e))
+
+        success, result = _literal_conversions[key]
+        if success and not isinstance(result, _immutable_types):
+            result = copy.deepcopy(result) #dont let the caller modify the cached value
+        return success, result
+
+    def convert(input: str) -> Any:
+        value = input.strip()
+        i = 0
+        errors = []
+        for value_type in found_types:
+            i += 1
+            if issubclass(value_type, type(None)):
+                if value.lower() == 'none':
+                    return None
+                errors.append(str(value_type) + ": value was not 'none'")
+
+            elif issubclass(value_type, bool):
+                if value.lower() in ['true', '1', 'on']:
+                    return True
+
+                elif value.lower() in ['false', '0', 'off']:
+                    return False
 
-            except Exception as e:
-                errors.append(str(value_type) + ": " + str(e))
-                continue
+                else:
+                    if i == len(found_types):
+                        return value_type(value) #if its the last type might as well try and convert to bool
+                    errors.append(str(value_type) + ": value was not in either ['true', '1', 'on'] or ['false', '0', 'off']")
+
+            elif issubclass(value_type, list) or issubclass(value_type, dict) \
+                or issubclass(value_type, set) or issubclass(type(value_type), GenericAlias):
+                success, result = convert_literal(value, value_type)
+                if success:
+                    return result
+                errors.append(result)
+            else:
+                try:
+                    return value_type(value)
+
+                except Exception as e:
+                    errors.append(str(value_type) + ": " + str(e))
+                    continue
+
+        newline = "\n"
+        raise Exception(f"'{value}' could not be converted to {target_type}, here's the conversion failure message(s):\n\n{newline.join([' - ' + str(validation_error) for validation_error in errors])}\n\n")
 
-    newline = "\n"
-    raise Exception(f"'{value}' could not be converted to {target_type}, here's the conversion failure message(s):\n\n{newline.join([' - ' + str(validation_error) for validation_error in errors])}\n\n")
+    return convert
@@ -1,6 +1,8 @@
-from BaseClasses import Item
+from typing import Iterable, Optional, Counter
+from BaseClasses import Item, ItemClassification
 from .Data import item_table
 from .Game import filler_item_name, starting_index
+from .Helpers import format_state_prog_items_key, ProgItemsCat
 
 
 ######################
@@ -64,6 +66,42 @@ item_id_to_name[None] = "__Victory__"
 item_name_to_id = {name: id for id, name in item_id_to_name.items()}
 
 
+######################
+# Item classifications
+######################
+
+def get_default_item_classification(item: dict) -> ItemClassification:
+    """Returns the classification an item gets from the flags set on it in items.json"""
+    classification = ItemClassification.filler
+
+    if "trap" in item and item["trap"]:
+        classification |= ItemClassification.trap
+
+    if "useful" in item and item["useful"]:
+        classification |= ItemClassification.useful
+
+    if "progression_skip_balancing" in item and item["progression_skip_balancing"]:
+        classification |= ItemClassification.progression_skip_balancing
+    elif "progression" in item and item["progression"]:
+        classification |= ItemClassification.progression
+
+    return classification
+
+item_name_to_classification: dict[str, ItemClassification] = {name: get_default_item_classification(item) for name, item in item_name_to_item.items()}
+
+
+######################
+# Item values
+######################
+
+# Only the items that have a 'value', with each value already converted to int
+item_name_to_values: dict[str, dict[str, int]] = {name: {key: int(value) for key, value in item['value'].items()}
+                                                  for name, item in item_name_to_item.items() if item.get('value')}
+# The state.prog_items keys and amounts that collecting one copy of an item adds, for ItemValue requirements
+item_name_to_value_keys: dict[str, list[tuple[str, int]]] = {name: [(format_state_prog_items_key(ProgItemsCat.VALUE, key), value) for key, value in values.items()]
+                                                             for name, values in item_name_to_values.items()}
+
+
 ######################
 # Item classes
 ######################
@@ -71,3 +109,153 @@ item_name_to_id = {name: id for id, name in item_id_to_name.items()}
 
 class ManualItem(Item):
     game = "Manual"
+
+
+class ManualItemIndex:
+    """Index of one player's items that are in the multiworld: still in the item pool, placed at a location, or precollected.\n
+    It's built at the end of create_items and kept up to date by the world as it places, removes and precollects items,
+    so looking up a player's items never needs to scan every player's items.
+    Hooks that add or remove this player's items after create_items should go through add/remove (or add_precollected/remove_precollected) too."""
+
+    def __init__(self, items: Iterable[Item] = (), precollected: Iterable[Item] = (), value_cache: Optional["ItemValueCache"] = None):
+        self.items: dict[int, Item] = {}
+        self.precollected: dict[int, Item] = {}
+        self.value_cache = value_cache
+        for item in items:
+            self.add(item)
+        for item in precollected:
+            self.add_precollected(item)
+
+    def add(self, item: Item):
+        self._add_to(self.items, item)
+
+    def remove(self, item: Item):
+        self._remove_from(self.items, item)
+
+    def add_precollected(self, item: Item):
+        self._add_to(self.precollected, item)
+
+    def remove_precollected(self, item: Item):
+        self._remove_from(self.precollected, item)
+
+    def _add_to(self, items: dict[int, Item], item: Item):
+        if id(item) in items:
+            return
+        items[id(item)] = item
+        if self.value_cache is not None:
+            self.value_cache.add_item(item)
+
+    def _remove_from(self, items: dict[int, Item], item: Item):
+        if items.pop(id(item), None) is not None and self.value_cache is not None:
+            self.value_cache.remove_item(item)
+
+    def sync(self, items: Iterable[Item], precollected: Iterable[Item]):
+        """Brings the index in line with the given items, for changes the world couldn't follow one by one"""
+        items = {id(item): item for item in items}
+        for item in [item for key, item in self.items.items() if key not in items]:
+            self.remove(item)
+        for item in items.values():
+            self.add(item)
+        self.sync_precollected(precollected)
+
+    def sync_precollected(self, precollected: Iterable[Item]):
+        """Brings the precollected items in line with the given ones. The multiworld already keeps them per player, so this is cheap"""
+        precollected = {id(item): item for item in precollected}
+        for item in [item for key, item in self.precollected.items() if key not in precollected]:
+            self.remove_precollected(item)
+        for item in precollected.values():
+            self.add_precollected(item)
+
+    def get_items(self, include_precollected: bool = False) -> list[Item]:
+        items = list(self.items.values())
+        if include_precollected:
+            items.extend(self.precollected.values())
+        return items
+
+    def __contains__(self, item: Item) -> bool:
+        return id(item) in self.items or id(item) in self.precollected
+
+    def __len__(self) -> int:
+        return len(self.items) + len(self.precollected)
+
+
+class ItemValueCache:
+    """Cache of the values ('value' in items.json) carried by one player's items, used by get_items_with_value and the pre-fill ItemValue check.\n
+    The player's ManualItemIndex feeds it every item added to or removed from the index (precollected ones included),
+    and the results computed so far are updated in place, so it follows the index instead of going stale.
+    hits and misses count how often a value lookup was answered from the cache."""
+
+    def __init__(self, items: Iterable[Item] = ()):
+        self.hits = 0
+        self.misses = 0
+        self._item_counts: Counter[str] = Counter()
+        self._progression_counts: Counter[str] = Counter()
+        self._items_with_value: dict[str, dict[str, int]] = {}
+        self._progression_totals: dict[str, int] = {}
+
+        for item in items:
+            self.add_item(item)
+
+    def add_item(self, item: Item):
+        values = item_name_to_values.get(item.name)
+        if item.code is None or not values:
+            return
+
+        self._item_counts[item.name] += 1
+        if item.advancement:
+            self._progression_counts[item.name] += 1
+
+        for value, amount in values.items():
+            if value in self._items_with_value:
+                self._items_with_value[value][item.name] = amount
+            if item.advancement and value in self._progression_totals:
+                self._progression_totals[value] += amount
+
+    def remove_item(self, item: Item):
+        values = item_name_to_values.get(item.name)
+        if item.code is None or not values or not self._item_counts[item.name]:
+            return
+
+        self._item_counts[item.name] -= 1
+        progression_removed = item.advancement and self._progression_counts[item.name] > 0
+        if progression_removed:
+            self._progression_counts[item.name] -= 1
+
+        for value, amount in values.items():
+            if not self._item_counts[item.name]:
+                self._items_with_value.get(value, {}).pop(item.name, None)
+            if progression_removed and value in self._progression_totals:
+                self._progression_totals[value] -= amount
+
+    def invalidate(self, value: Optional[str] = None) -> dict[str, int]:
+        """Drop the computed results for one value (returning its items with value, if they were computed), or for every value if none is given.
+        They get recomputed from the counted items on the next lookup."""
+        if value is None:
+            self._items_with_value.clear()
+            self._progression_totals.clear()
+            return {}
+
+        value = value.lower().strip()
+        self._progression_totals.pop(value, None)
+        return self._items_with_value.pop(value, {})
+
+    def get_items_with_value(self, value: str) -> dict[str, int]:
+        """Returns {'Item Name': value per copy} for every item of the player that has some of the requested value"""
+        value = value.lower().strip()
+        if value in self._items_with_value:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._items_with_value[value] = {name: item_name_to_values[name][value] for name, count in self._item_counts.items()
+                                             if count and value in item_name_to_values[name]}
+        return self._items_with_value[value]
+
+    def get_progression_total(self, value: str) -> int:
+        """Returns the total amount of the requested value carried by the player's progression items"""
+        value = value.lower().strip()
+        if value in self._progression_totals:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._progression_totals[value] = sum(count * item_name_to_values[name].get(value, 0) for name, count in self._progression_counts.items())
+        return self._progression_totals[value]
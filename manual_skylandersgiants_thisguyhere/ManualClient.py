@@ -1,10 +1,12 @@
 from __future__ import annotations
 import asyncio
+import logging
 import os
-import re
 import sys
+import threading
 import time
 import typing
+from collections import Counter
 from typing import Any, Optional
 
 import requests
@@ -20,16 +22,12 @@ ModuleUpdate.update()
 import Utils
 
 from NetUtils import ClientStatus
-from CommonClient import gui_enabled, logger, get_base_parser, ClientCommandProcessor, server_loop
+from CommonClient import gui_enabled, logger, get_base_parser, ClientCommandProcessor, CommonContext, server_loop
 from MultiServer import mark_raw
 
-tracker_loaded = False
-try:
-    from worlds.tracker.TrackerClient import TrackerGameContext as SuperContext, TrackerCommandProcessor
-    ClientCommandProcessor = TrackerCommandProcessor
-    tracker_loaded = True
-except ModuleNotFoundError:
-    from CommonClient import CommonContext as SuperContext
+from .ClientLogic import ManualLogic, create_manual_logic
+from .Helpers import is_passthrough_hook
+from .hooks.World import before_create_region_connections
 
 if typing.TYPE_CHECKING:
     import kvui
@@ -38,7 +36,7 @@ class ManualClientCommandProcessor(ClientCommandProcessor):
     def _cmd_resync(self) -> bool:
         """Manually trigger a resync."""
         self.output("Syncing items.")
-        self.ctx.syncing = True
+        self.ctx.request_sync()
         return True
 
     @mark_raw
@@ -51,8 +49,7 @@ class ManualClientCommandProcessor(ClientCommandProcessor):
         )
         if usable:
             location_id = self.ctx.location_names_to_id[location_name]
-            self.ctx.locations_checked.append(location_id)
-            self.ctx.syncing = True
+            self.ctx.queue_location_check(location_id)
         else:
             self.output(response)
             return False
@@ -60,8 +57,47 @@ class ManualClientCommandProcessor(ClientCommandProcessor):
 
 
 
+class ManualSearchIndex:
+    """Lowercased names and categories by id, built once so searching never has to look up or lowercase a name again.
+    An id matches when the query is in its name or in one of its categories.
+    When the query is extended, only the previous matches are searched, since anything matching the longer query matched the shorter one too."""
 
-class ManualContext(SuperContext):
+    def __init__(self, entries: typing.Iterable[tuple[int, str, typing.Iterable[str]]] = ()):
+        self.names: dict[int, str] = {}
+        self.categories: dict[int, tuple[str, ...]] = {}
+        self.term = ""
+        self.matches: Optional[set[int]] = None
+
+        for id, name, categories in entries:
+            self.add(id, name, categories)
+
+    def add(self, id: int, name: str, categories: typing.Iterable[str] = ()):
+        self.names[id] = name.lower()
+        self.categories[id] = tuple(category.lower() for category in categories)
+        # the new name hasn't been checked against the current query, so the next search starts over
+        self.term = ""
+        self.matches = None
+
+    def is_match(self, id: int, term: str) -> bool:
+        return term in self.names[id] or any(term in category for category in self.categories[id])
+
+    def search(self, term: str) -> Optional[set[int]]:
+        """Returns the ids whose name or one of whose categories contains the term, or None when there's no term to filter by"""
+        term = term.lower()
+        if not term:
+            self.term = ""
+            self.matches = None
+            return None
+
+        if term != self.term:
+            candidates = self.matches if self.matches is not None and self.term in term else self.names
+            self.matches = {id for id in candidates if self.is_match(id, term)}
+            self.term = term
+
+        return self.matches
+
+
+class ManualContext(CommonContext):
     command_processor = ManualClientCommandProcessor
     game = None  # this is changed in server_auth below based on user input
     items_handling = 0b111  # full remote
@@ -72,8 +108,17 @@ class ManualContext(SuperContext):
     region_table = {}
     category_table = {}
 
-    tracker_reachable_locations = []
-    tracker_reachable_events = []
+    tracker_reachable_locations: set[str] = set()
+    tracker_reachable_location_ids: set[int] = set()
+    tracker_reachable_events: set[str] = set()
+
+    # whether Universal Tracker is mixed in (see get_context_class), otherwise logic is worked out locally from the .apmanual data
+    tracker_loaded: bool = False
+    local_logic: Optional[ManualLogic] = None
+
+    # headless, there's no UI and received items are written to this as JSON lines instead
+    headless: bool = False
+    headless_output: typing.TextIO = sys.stdout
 
     set_deathlink = False
     last_death_link = 0
@@ -81,6 +126,9 @@ class ManualContext(SuperContext):
 
     search_term = ""
 
+    # how long the sender waits after being woken up, so location checks made in quick succession go out as one packet
+    location_check_coalesce_window = 0.05
+
     colors = {
         'location_default': [219/255, 218/255, 213/255, 1],
         'location_in_logic': [2/255, 242/255, 42/255, 1],
@@ -97,13 +145,28 @@ class ManualContext(SuperContext):
     def __init__(self, server_address, password, game, player_name) -> None:
         super(ManualContext, self).__init__(server_address, password)
 
-        if tracker_loaded:
+        if self.tracker_loaded:
             super().set_callback(self.on_tracker_updated) # Universal Tracker takes this func and calls it when updateTracker is called
             if hasattr(self, "set_events_callback"):
                 super().set_events_callback(self.on_tracker_events) # Universal Tracker takes this func and calls it when events are calculated
 
         self.send_index: int = 0
         self.syncing = False
+        self.victory_pending = False
+        self.pending_location_checks: set[int] = set()
+        self.send_requested = asyncio.Event()
+
+        # counts of received item ids, kept up to date from the new tail of items_received
+        self.received_item_counts: Counter[int] = Counter()
+        self.received_item_counts_by_category: dict[str, Counter[int]] = {}
+        self.counted_items_received: Optional[list] = None
+        self.counted_items_length = 0
+
+        self.item_search_index = ManualSearchIndex()
+        self.location_search_index = ManualSearchIndex()
+
+        # ids of the locations whose reachability changed since the locations panel last caught up
+        self.tracker_reachability_changes: set[int] = set()
         self.game = game
         self.username = player_name
 
@@ -111,10 +174,12 @@ class ManualContext(SuperContext):
         if password_requested and not self.password:
             await super(ManualContext, self).server_auth(password_requested)
 
-        if "Manual_" not in self.ui.game_bar_text.text:
+        # headless, the game can only come from the .apmanual file
+        game = self.ui.game_bar_text.text if self.ui else self.game
+        if not game or "Manual_" not in game:
             raise Exception("The Manual client can only be used for Manual games.")
 
-        self.game = self.ui.game_bar_text.text
+        self.game = game
 
         world = AutoWorldRegister.world_types.get(self.game)
         if not self.location_table and not self.item_table and world is None:
@@ -175,6 +240,116 @@ class ManualContext(SuperContext):
             if game == self.game:
                 self.update_ids(game_data)
 
+    def request_send(self):
+        """Wakes up game_watcher_manual so it sends whatever was queued"""
+        self.send_requested.set()
+
+    def queue_location_check(self, location_id: int):
+        self.locations_checked.add(location_id)
+        self.pending_location_checks.add(location_id)
+        self.request_send()
+
+    def request_sync(self):
+        self.syncing = True
+        self.request_send()
+
+    def queue_victory(self):
+        self.victory_pending = True
+        self.request_send()
+
+    def build_search_indexes(self):
+        """Indexes every item of the game and every location of the slot, with their categories, for searching"""
+        self.item_search_index = ManualSearchIndex(
+            (item_id, item_name, self.get_item_by_name(item_name).get("category", []))
+            for item_name, item_id in getattr(self, "item_names_to_id", {}).items())
+        self.location_search_index = ManualSearchIndex(
+            (location_id, location["name"], location.get("category", []))
+            for location_id, location in ((location_id, self.get_location_by_id(location_id))
+                                          for location_id in self.missing_locations | self.checked_locations))
+
+    def update_received_item_counts(self) -> set[int]:
+        """Counts the items received since the last call, and returns the ids whose count changed.
+        If items_received was replaced or shrunk (like after a reconnect), everything is counted again."""
+        if self.counted_items_received is not self.items_received or self.counted_items_length > len(self.items_received):
+            changed_ids = set(self.received_item_counts)
+            self.received_item_counts.clear()
+            self.received_item_counts_by_category.clear()
+            self.counted_items_received = self.items_received
+            self.counted_items_length = 0
+
+            if self.local_logic:
+                self.update_local_logic(reset=True)
+        else:
+            changed_ids = set()
+
+        new_items = self.items_received[self.counted_items_length:]
+        self.counted_items_length = len(self.items_received)
+
+        if self.local_logic and new_items:
+            self.update_local_logic(self.item_names.lookup_in_game(network_item.item) for network_item in new_items)
+
+        for network_item in new_items:
+            item_id = network_item.item
+            self.received_item_counts[item_id] += 1
+            changed_ids.add(item_id)
+
+            item_data = self.get_item_by_id(item_id)
+            for category in item_data.get("category") or ["(No Category)"]:
+                self.received_item_counts_by_category.setdefault(category, Counter())[item_id] += 1
+
+        return changed_ids
+
+    def write_received_items(self, start_index: int, network_items: list):
+        """Writes each received item as a JSON line to headless_output"""
+        for index, network_item in enumerate(network_items, start_index):
+            self.headless_output.write(json.dumps({
+                "index": index,
+                "item": self.item_names.lookup_in_game(network_item.item),
+                "item_id": network_item.item,
+                "location": network_item.location,
+                "player": network_item.player,
+                "flags": network_item.flags,
+            }) + "\n")
+        self.headless_output.flush()
+
+    def resolve_location_check(self, text: str) -> Optional[int]:
+        """Returns the id of the location a line of headless input refers to, by name or by id"""
+        text = text.strip()
+        if text in self.location_names_to_id:
+            return self.location_names_to_id[text]
+        if text.isdigit() and int(text) in self.missing_locations | self.checked_locations:
+            return int(text)
+        return None
+
+    def build_local_logic(self, slot_data: Optional[dict]):
+        """Sets up local logic from the .apmanual data, when Universal Tracker isn't there to provide it"""
+        if self.tracker_loaded or self.headless:
+            return
+
+        world = AutoWorldRegister.world_types.get(self.game)
+        if "region_connections" not in (slot_data or {}) and world is not None and world.__module__ == __package__ \
+                and not is_passthrough_hook(before_create_region_connections):
+            # this game's regions get rewired at generation, and this seed didn't send how, so regions.json can't be trusted
+            logger.info("Local logic is off, since this seed's region connections aren't in its slot data.")
+            return
+
+        self.local_logic = create_manual_logic({"items": self.item_table, "locations": self.location_table, "regions": self.region_table}, slot_data)
+        if self.local_logic:
+            received_names = (self.item_names.lookup_in_game(item_id) for item_id in self.received_item_counts.elements())
+            self.update_local_logic(received_names)
+
+    def update_local_logic(self, item_names: typing.Iterable[str] = (), reset: bool = False):
+        """Feeds received items to the local logic, and passes any change along the same way Universal Tracker would"""
+        changed = self.local_logic.reset() if reset else set()
+        changed |= self.local_logic.add_items(item_names)
+
+        if changed:
+            self.on_tracker_updated(list(self.local_logic.reachable_locations))
+
+        victory_reachable = self.goal_location.get("name") in self.local_logic.reachable_locations
+        if victory_reachable != ("__Victory__" in self.tracker_reachable_events):
+            self.on_tracker_events(["__Victory__"] if victory_reachable else [])
+
     def set_search(self, search_term: str):
         self.search_term = search_term
 
@@ -202,30 +377,46 @@ class ManualContext(SuperContext):
                     if goal and goal < len(self.victory_names):
                         self.goal_location = self.get_location_by_name(self.victory_names[goal])
                     if args['slot_data'].get('death_link'):
-                        self.ui.enable_death_link()
+                        if self.ui:
+                            self.ui.enable_death_link()
                         self.set_deathlink = True
                         self.last_death_link = 0
+                        self.request_send()
                     logger.info(f"Slot data: {args['slot_data']}")
+                self.build_local_logic(args.get("slot_data"))
 
-            self.ui.build_tracker_and_locations_table()
-            self.ui.request_update_tracker_and_locations_table(update_highlights=True)
+            if self.ui:
+                self.build_search_indexes()
+                self.ui.build_tracker_and_locations_table()
+                self.ui.request_update_tracker_and_locations_table(update_highlights=True)
         elif cmd in {"ReceivedItems"}:
-            self.ui.request_update_tracker_and_locations_table(update_highlights=True)
+            if self.headless:
+                self.write_received_items(args["index"], args["items"])
+            self.update_received_item_counts()
+            if self.ui:
+                self.ui.request_update_tracker_and_locations_table(update_highlights=True)
         elif cmd in {"RoomUpdate"}:
-            self.ui.request_update_tracker_and_locations_table(update_highlights=False)
+            if self.ui:
+                self.ui.request_update_tracker_and_locations_table(update_highlights=False)
 
     def on_deathlink(self, data: typing.Dict[str, typing.Any]) -> None:
         super().on_deathlink(data)
-        self.ui.death_link_button.text = f"Death Link: {data['source']}"
-        self.ui.death_link_button.background_color = self.colors['deathlink_received']
+        if self.ui:
+            self.ui.death_link_button.text = f"Death Link: {data['source']}"
+            self.ui.death_link_button.background_color = self.colors['deathlink_received']
 
     def on_tracker_updated(self, reachable_locations: list[str]):
-        self.tracker_reachable_locations = reachable_locations
-        self.ui.request_update_tracker_and_locations_table(update_highlights=True)
+        self.tracker_reachable_locations = set(reachable_locations)
+        location_names_to_id = getattr(self, "location_names_to_id", {})
+        reachable_ids = {location_names_to_id[name] for name in self.tracker_reachable_locations if name in location_names_to_id}
+        self.tracker_reachability_changes |= reachable_ids ^ self.tracker_reachable_location_ids
+        self.tracker_reachable_location_ids = reachable_ids
+        if self.ui:
+            self.ui.request_update_tracker_and_locations_table(update_highlights=True)
 
     def on_tracker_events(self, events: list[str]):
-        self.tracker_reachable_events = events
-        if events:
+        self.tracker_reachable_events = set(events)
+        if events and self.ui:
             self.ui.request_update_tracker_and_locations_table(update_highlights=True)
 
     def handle_connection_loss(self, msg: str) -> None:
@@ -250,7 +441,7 @@ class ManualContext(SuperContext):
 
     def run_gui(self):
         """Import kivy UI system from make_gui() and start running it as self.ui_task."""
-        if hasattr(SuperContext, "make_gui"):
+        if hasattr(CommonContext, "make_gui"):
             # Call the real one if it exists
             return super().run_gui()
 
@@ -261,7 +452,7 @@ class ManualContext(SuperContext):
         self.ui_task = asyncio.create_task(self.ui.async_run(), name="UI")
 
     def make_gui(self) -> typing.Type["kvui.GameManager"]:
-        if hasattr(SuperContext, "make_gui"):
+        if hasattr(CommonContext, "make_gui"):
             ui = super().make_gui()  # before the kivy imports so kvui gets loaded first
         else:
             from kvui import GameManager
@@ -275,10 +466,14 @@ class ManualContext(SuperContext):
         from kivy.uix.label import Label
         from kivy.uix.layout import Layout
         from kivy.uix.scrollview import ScrollView
+        from kivy.uix.recycleview import RecycleView
+        from kivy.uix.recycleboxlayout import RecycleBoxLayout
+        from kivy.app import App
         from kivy.uix.spinner import Spinner, SpinnerOption
         from kivy.uix.textinput import TextInput
         from kivy.uix.treeview import TreeView, TreeViewNode, TreeViewLabel
         from kivy.core.window import Window
+        from kivy.clock import Clock
         from kivy.lang import Builder
         from kivy.properties import ColorProperty
 
@@ -297,12 +492,30 @@ class ManualContext(SuperContext):
         class LocationsLayoutScrollable(ScrollView):
             pass
 
-        class TreeViewButton(Button, TreeViewNode):
+        class TreeViewRecycleView(RecycleView, TreeViewNode):
+            """A category's list of rows. Only the rows that are scrolled into view get a widget, and those widgets are reused."""
+            def __init__(self, viewclass, **kwargs):
+                super().__init__(**kwargs)
+                self.viewclass = viewclass
+                layout = RecycleBoxLayout(orientation="vertical", size_hint=(None, None), width=dp(400),
+                                          default_size=(dp(400), dp(30)), default_size_hint=(None, None))
+                layout.bind(minimum_height=layout.setter('height'))
+                self.add_widget(layout)
+
+        class ItemLabel(Label):
+            item_id: int = None
+
+        class LocationButton(Button):
+            # every row sets both of these, since recycled buttons keep whatever the previous row left on them
+            location_id: Optional[int] = None
             victory: bool = False
-            id: int = None
 
-        class TreeViewScrollView(ScrollView, TreeViewNode):
-            pass
+            def on_release(self):
+                manager = App.get_running_app()
+                if self.victory:
+                    manager.victory_button_callback(self)
+                else:
+                    manager.location_button_callback(self.location_id, self)
 
         class GameSelectOption(SpinnerOption):
             background_color = self.colors['game_select_button']
@@ -331,8 +544,20 @@ class ManualContext(SuperContext):
             base_title = "Archipelago Manual Client"
             listed_items = {"(No Category)": []}
             item_categories = ["(No Category)"]
+            items_received_label: Optional[TreeViewLabel] = None
+            item_category_nodes: dict[str, tuple[TreeViewLabel, TreeViewRecycleView]] = {}
+            item_rows: dict[int, dict] = {}
+            highlighted_item_ids: set[int] = set()
+            item_search_term: Optional[str] = None
             listed_locations = {"(No Category)": []}
             location_categories = ["(No Category)"]
+            locations_remaining_label: Optional[TreeViewLabel] = None
+            location_category_nodes: dict[str, tuple[TreeViewLabel, TreeViewRecycleView]] = {}
+            location_rows: dict[int, dict] = {}
+            victory_categories: set[str] = set()
+            victory_row: dict = {}
+            victory_reachable: bool = False
+            location_search_term: Optional[str] = None
 
             active_item_accordion = 0
             active_location_accordion = 0
@@ -344,6 +569,8 @@ class ManualContext(SuperContext):
 
             def __init__(self, ctx):
                 super().__init__(ctx)
+                # requests made while one is already pending are folded into it, and it always runs once its 0.25 seconds are up
+                self.update_trigger = Clock.create_trigger(lambda dt: self.check_for_requested_update(force=True), 0.25)
 
             def build(self) -> Layout:
                 super().build()
@@ -375,6 +602,15 @@ class ManualContext(SuperContext):
             def clear_lists(self):
                 self.listed_items = {"(No Category)": []}
                 self.item_categories = ["(No Category)"]
+                self.items_received_label = None
+                self.item_category_nodes = {}
+                self.item_rows = {}
+                self.highlighted_item_ids = set()
+                self.item_search_term = None
+                self.locations_remaining_label = None
+                self.location_category_nodes = {}
+                self.location_rows = {}
+                self.location_search_term = None
                 self.listed_locations = {"(No Category)": [], "(Hinted)": []}
                 self.location_categories = ["(No Category)", "(Hinted)"]
 
@@ -412,6 +648,7 @@ class ManualContext(SuperContext):
                     self.death_link_button.background_color = self.ctx.colors['deathlink_primed']
                 else:
                     self.ctx.deathlink_out = True
+                    self.ctx.request_send()
                     self.death_link_button.text = "Death Link: Sent"
                     self.death_link_button.background_color = self.ctx.colors['deathlink_sent']
 
@@ -433,7 +670,9 @@ class ManualContext(SuperContext):
 
             def update_search_from_input(self, instance, text: str):
                 self.ctx.set_search(text)
-                self.request_update_tracker_and_locations_table() # if we want search to be "snappier", we can just make this update
+                # every keystroke restarts the wait, so filtering only happens once typing pauses
+                self.update_trigger.cancel()
+                self.request_update_tracker_and_locations_table()
 
             def clear_search_input(self):
                 self.search_textbox.text = ""
@@ -524,26 +763,32 @@ class ManualContext(SuperContext):
                 for category in self.listed_locations:
                     self.listed_locations[category].sort()
 
+                self.victory_categories = victory_categories
+                victory_text = "VICTORY! (seed finished)" if victory_location["name"] == "__Manual Game Complete__" else "GOAL: " + victory_location["name"]
+                self.victory_reachable = "__Victory__" in self.ctx.tracker_reachable_events
+                self.victory_row = {"text": victory_text, "location_id": None, "victory": True,
+                                    "background_color": self.get_location_color(self.victory_reachable)}
+
                 items_length = len(self.ctx.items_received)
                 tracker_panel_scrollable = TrackerLayoutScrollable(do_scroll=(False, True), bar_width=10)
                 tracker_panel = TreeView(root_options=dict(text="Items Received (%d)" % (items_length)), size_hint_y=None)
                 tracker_panel.bind(minimum_height=tracker_panel.setter('height'))
+                self.items_received_label = tracker_panel.root
 
-                # Since items_received is not available on connect, don't bother building item labels here
+                # Since items_received is not available on connect, don't bother building item rows here
                 for item_category in sorted(self.listed_items.keys()):
                     category_tree = tracker_panel.add_node(
                         TreeViewLabel(text = "%s (%s)" % (item_category, len(self.listed_items[item_category])))
                     )
 
-                    category_scroll = tracker_panel.add_node(TreeViewScrollView(size_hint=(1, None), size=(Window.width / 2, 250)), category_tree)
-                    category_layout = GridLayout(cols=1, size_hint_y=None)
-                    category_layout.bind(minimum_height = category_layout.setter('height'))
-                    category_scroll.add_widget(category_layout)
+                    category_view = tracker_panel.add_node(TreeViewRecycleView(ItemLabel, size_hint=(1, None), size=(Window.width / 2, 250)), category_tree)
+                    self.item_category_nodes[item_category] = (category_tree, category_view)
 
                 locations_length = len(self.ctx.missing_locations)
                 locations_panel_scrollable = LocationsLayoutScrollable(do_scroll=(False, True), bar_width=10)
                 locations_panel = TreeView(root_options=dict(text="Remaining Locations (%d)" % (locations_length + 1)), size_hint_y=None)
                 locations_panel.bind(minimum_height=locations_panel.setter('height'))
+                self.locations_remaining_label = locations_panel.root
 
                 # This seems like a redundant copy of the same check above?
                 if not self.ctx.location_table and not hasattr(AutoWorldRegister.world_types[self.ctx.game], 'location_name_to_location'):
@@ -552,46 +797,41 @@ class ManualContext(SuperContext):
                 for location_category in sorted(self.listed_locations.keys()):
                     locations_in_category = len(self.listed_locations[location_category])
 
-                    if (location_category in victory_categories) or \
-                        (not victory_categories and location_category == "(No Category)"):
+                    # the Victory location can be marked at any point, so it's listed in its categories too
+                    if location_category in victory_categories:
                         locations_in_category += 1
 
                     category_tree = locations_panel.add_node(
                         TreeViewLabel(text = "%s (%s)" % (location_category, locations_in_category))
                     )
 
-                    category_scroll = locations_panel.add_node(TreeViewScrollView(size_hint=(1, None), size=(Window.width / 2, 250)), category_tree)
-                    category_layout = GridLayout(cols=1, size_hint_y=None)
-                    category_layout.bind(minimum_height = category_layout.setter('height'))
-                    category_scroll.add_widget(category_layout)
+                    category_view = locations_panel.add_node(TreeViewRecycleView(LocationButton, size_hint=(1, None), size=(Window.width / 2, 250)), category_tree)
+                    self.location_category_nodes[location_category] = (category_tree, category_view)
 
                     for location_id in self.listed_locations[location_category]:
-                        location_button = TreeViewButton(text=self.ctx.location_names.lookup_in_game(location_id), size_hint=(None, None), height=30, width=400)
-                        location_button.bind(on_release=lambda *args, loc_id=location_id: self.location_button_callback(loc_id, *args))
-                        location_button.id = location_id
-                        category_layout.add_widget(location_button)
-
-                    # if this is the category that Victory is in, display the Victory button
-                    # if ("category" in victory_location_data and location_category in victory_location_data["category"]) or \
-                    #     ("category" not in victory_location_data and location_category == "(No Category)"):
+                        if location_id not in self.location_rows:
+                            reachable = location_id in self.ctx.tracker_reachable_location_ids
+                            self.location_rows[location_id] = {"text": self.ctx.location_names.lookup_in_game(location_id),
+                                                               "location_id": location_id, "victory": False,
+                                                               "background_color": self.get_location_color(reachable)}
+
+                    category_view.data = [self.location_rows[location_id] for location_id in self.listed_locations[location_category]]
                     if location_category in victory_categories:
-                        # Add the Victory location to be marked at any point, which is why locations length has 1 added to it above
-                        victory_text = "VICTORY! (seed finished)" if victory_location["name"] == "__Manual Game Complete__" else "GOAL: " + victory_location["name"]
-                        location_button = TreeViewButton(text=victory_text, size_hint=(None, None), height=dp(30), width=dp(400))
-                        location_button.victory = True
-                        location_button.bind(on_release=self.victory_button_callback)
-                        category_layout.add_widget(location_button)
+                        category_view.data.append(self.victory_row)
 
                 tracker_panel_scrollable.add_widget(tracker_panel)
                 locations_panel_scrollable.add_widget(locations_panel)
                 self.tracker_and_locations_panel.add_widget(tracker_panel_scrollable)
                 self.tracker_and_locations_panel.add_widget(locations_panel_scrollable)
 
-            def check_for_requested_update(self):
+                # every row was just colored from the current reachability
+                self.ctx.tracker_reachability_changes.clear()
+
+            def check_for_requested_update(self, force: bool = False):
                 current_time = time.time()
 
                 # wait 0.25 seconds before executing update, in case there are multiple update requests coming in
-                if self.update_requested_time and current_time - self.update_requested_time >= 0.25:
+                if self.update_requested_time is not None and (force or current_time - self.update_requested_time >= 0.25):
                     self.update_requested_time = None
                     self.update_tracker_and_locations_table(self.update_requested_highlights)
                     self.update_requested_highlights = False
@@ -599,294 +839,291 @@ class ManualContext(SuperContext):
             def request_update_tracker_and_locations_table(self, update_highlights=False):
                 self.update_requested_time = time.time()
                 self.update_requested_highlights = update_highlights or self.update_requested_highlights # if any of the requests wanted highlights, do highlight
+                self.update_trigger()
 
             def update_tracker_and_locations_table(self, update_highlights=False):
+                self.ctx.update_received_item_counts()
                 items_length = len(self.ctx.items_received)
                 locations_length = len(self.ctx.missing_locations)
 
-                if self.ctx.search_term:
-                    items_length = len([
-                        i for i in self.ctx.items_received
-                            if self.ctx.search_term.lower() in self.ctx.item_names.lookup_in_game(i.item).lower()
-                    ])
-
-                    locations_length = len([
-                        l for l in self.ctx.missing_locations
-                            if self.ctx.search_term.lower() in self.ctx.location_names.lookup_in_game(l).lower()
-                    ])
-
-                for _, child in enumerate(self.tracker_and_locations_panel.children):
-                    #
-                    # Structure of items:
-                    # TrackerLayoutScrollable -> TreeView -> TreeViewLabel, TreeViewScrollView -> GridLayout -> Label
-                    #        item tracker     -> category -> category label, category scroll   -> label col  -> item
-                    #
-                    if type(child) is TrackerLayoutScrollable:
-                        treeview = child.children[0] # TreeView
-                        treeview_nodes = treeview.iterate_all_nodes()
-
-                        items_received_label = next(treeview_nodes) # always the first node
-                        items_received_label.text = "Items Received (%s)" % (items_length)
-
-                        # loop for each category in listed items and get the label + scrollview
-                        for x in range(0, len(self.item_categories)):
-                            category_label = next(treeview_nodes) # TreeViewLabel for category
-                            category_scrollview = next(treeview_nodes) # TreeViewScrollView for housing category's grid layout
-
-                            old_category_text = category_label.text
-
-                            if type(category_label) is TreeViewLabel and type(category_scrollview) is TreeViewScrollView:
-                                category_grid = category_scrollview.children[0] # GridLayout
-
-                                category_name = re.sub(r"\s\(\d+\)$", "", category_label.text)
-                                category_count = 0
-                                category_unique_name_count = 0
-
-                                existing_item_labels = []
-                                bold_item_labels = []
-
-                                # for items that were already listed, determine if the qty changed. if it did, add them to the list to be bolded
-                                for item in category_grid.children:
-                                    if type(item) is Label:
-                                        # Get the item name from the item Label, minus quantity, then do a lookup for count
-                                        old_item_text = item.text
-                                        item_name = re.sub(r"\s\(\d+\)$", "", item.text)
-                                        item_id = self.ctx.item_names_to_id[item_name]
-                                        item_count = len(list(i for i in self.ctx.items_received if i.item == item_id))
-
-                                        # if the player is searching for text and the item name doesn't contain it, skip it
-                                        if self.ctx.search_term and not self.ctx.search_term.lower() in item_name.lower():
-                                            item.width = 0
-                                            item.height = 0
-                                            item.opacity = 0
-                                        else:
-                                            item.width = dp(400)
-                                            item.height = dp(30)
-                                            item.opacity = 1
-
-                                            if item_count > 0:
-                                                category_count += item_count
-                                                category_unique_name_count += 1
-
-                                        # Update the label quantity
-                                        item.text="%s (%s)" % (item_name, item_count)
-
-                                        if update_highlights and (old_item_text != item.text):
-                                            bold_item_labels.append(item_name)
-
-                                        existing_item_labels.append(item_name)
-
-                                # instead of reusing existing item listings, clear it all out and re-draw with the sorted list
-                                category_grid.clear_widgets()
-                                self.listed_items[category_name].clear()
-                                category_count = 0
-                                category_unique_name_count = 0
-
-                                # Label (for all item listings)
-                                sorted_items_received = sorted([
-                                    i.item for i in self.ctx.items_received
-                                ])
-
-                                for network_item in sorted_items_received:
-                                    item_name = self.ctx.item_names.lookup_in_game(network_item)
-                                    item_data = self.ctx.get_item_by_name(item_name)
-
-                                    # if the player is searching for text and the item name doesn't contain it, skip it
-                                    if self.ctx.search_term and not self.ctx.search_term.lower() in item_name.lower():
-                                        continue
-
-                                    if "category" not in item_data or not item_data["category"]:
-                                        item_data["category"] = ["(No Category)"]
-
-                                    if category_name in item_data["category"] and network_item not in self.listed_items[category_name]:
-                                        item_count = len(list(i for i in self.ctx.items_received if i.item == network_item))
-                                        item_text = Label(text="%s (%s)" % (item_name, item_count),
-                                                    size_hint=(None, None), height=dp(30), width=dp(400), bold=True)
-
-                                        # if the item was previously listed and was bold, or if it wasn't previously listed at all, make it bold
-                                        item_text.bold = (update_highlights and (item_name in bold_item_labels or item_name not in existing_item_labels))
-
-                                        category_grid.add_widget(item_text)
-                                        self.listed_items[category_name].append(network_item)
-
-                                        category_count += item_count
-                                        category_unique_name_count += 1
-
-                            scrollview_height = 30 * category_unique_name_count
-
-                            if scrollview_height > 250:
-                                scrollview_height = 250
-
-                            if scrollview_height < 10:
-                                scrollview_height = 50
-
-                            category_name = re.sub(r"\s\(\d+\)$", "", category_label.text)
-                            category_label.text = "%s (%s)" % (category_name, category_count)
+                matching_item_ids = self.ctx.item_search_index.search(self.ctx.search_term)
+                matching_location_ids = self.ctx.location_search_index.search(self.ctx.search_term)
 
-                            if update_highlights:
-                                category_label.bold = True if old_category_text != category_label.text else False
-
-                            category_scrollview.size=(Window.width / 2, scrollview_height)
+                if matching_item_ids is not None:
+                    items_length = sum(
+                        item_count for item_id, item_count in self.ctx.received_item_counts.items()
+                            if item_id in matching_item_ids
+                    )
 
-                    #
-                    # Structure of locations:
-                    # LocationsLayoutScrollable -> TreeView -> TreeViewLabel, TreeViewScrollView -> GridLayout -> Button
-                    #      location tracker     -> category -> category label, category scroll   -> label col  -> location
-                    #
-                    if type(child) is LocationsLayoutScrollable:
-                        treeview = child.children[0] # TreeView
-                        treeview_nodes = treeview.iterate_all_nodes()
-
-                        locations_remaining_label = next(treeview_nodes) # always the first node
-                        locations_remaining_label.text = "Remaining Locations (%d)" % (locations_length)
+                if matching_location_ids is not None:
+                    locations_length = len(matching_location_ids.intersection(self.ctx.missing_locations))
 
-                        # loop for each category in listed items and get the label + scrollview
-                        for x in range(0, len(self.location_categories)):
-                            category_label = next(treeview_nodes) # TreeViewLabel for category
-                            category_scrollview = next(treeview_nodes) # TreeViewScrollView for housing category's grid layout
+                self.update_item_tracker(items_length, matching_item_ids, update_highlights)
+                self.update_location_tracker(locations_length, matching_location_ids)
 
-                            if type(category_label) is TreeViewLabel and type(category_scrollview) is TreeViewScrollView:
-                                category_grid = category_scrollview.children[0] # GridLayout
+            @staticmethod
+            def get_category_view_height(row_count: int) -> int:
+                scrollview_height = 30 * row_count
 
-                                category_name = re.sub(r"\s\(\d+\/?(\d+)?\)$", "", category_label.text)
-                                category_count = 0
-                                reachable_count = 0
+                if scrollview_height > 250:
+                    scrollview_height = 250
 
-                                buttons_to_remove = []
+                if scrollview_height < 10:
+                    scrollview_height = 50
 
-                                # since victory is handled more briefly below, need to pull show/hide into functions here to reuse
-                                def show_button_during_search(btn: TreeViewButton):
-                                    btn.width = dp(400)
-                                    btn.height = dp(30)
-                                    btn.opacity = 1
-                                    btn.disabled = False
+                return scrollview_height
 
-                                def hide_button_during_search(btn: TreeViewButton):
-                                    btn.width = 0
-                                    btn.height = 0
-                                    btn.opacity = 0
-                                    btn.disabled = True
+            def update_item_tracker(self, items_length: int, matching_item_ids: Optional[set[int]], update_highlights: bool = False):
+                """Brings the item rows in line with the received item counts, adding rows for newly received items.
+                Only the categories containing an item whose count or highlight changed get their rows refreshed."""
+                if self.items_received_label is None:
+                    return
 
-                                # Label (for existing item listings)
-                                for location_button in category_grid.children:
-                                    if type(location_button) is TreeViewButton:
-                                        # should only be true for the victory location button, which has different text
-                                        if location_button.text not in (self.ctx.location_table or AutoWorldRegister.world_types[self.ctx.game].location_name_to_location):
-                                            # if the player is searching for text and the location name doesn't contain it, hide and disable it
-                                            if self.ctx.search_term and not self.ctx.search_term.lower() in location_button.text.lower():
-                                                hide_button_during_search(location_button)
-                                            else:
-                                                show_button_during_search(location_button)
-                                                category_count += 1
+                self.items_received_label.text = "Items Received (%s)" % (items_length)
+                search_term = self.ctx.item_search_index.term
+                search_changed = search_term != self.item_search_term
+                self.item_search_term = search_term
+
+                # the items highlighted last time lose their highlight, unless their count changed again
+                changed_ids = set(self.highlighted_item_ids)
+                self.highlighted_item_ids = set()
+
+                for item_id, item_count in self.ctx.received_item_counts.items():
+                    row = self.item_rows.get(item_id)
+                    if row is None:
+                        item_name = self.ctx.item_names.lookup_in_game(item_id)
+                        row = self.item_rows[item_id] = {"item_id": item_id, "item_name": item_name, "count": -1, "bold": False}
+
+                    if row["count"] != item_count:
+                        row["count"] = item_count
+                        row["text"] = "%s (%s)" % (row["item_name"], item_count)
+                        changed_ids.add(item_id)
+                        if update_highlights:
+                            self.highlighted_item_ids.add(item_id)
+
+                for item_id in changed_ids:
+                    if item_id in self.item_rows:
+                        self.item_rows[item_id]["bold"] = item_id in self.highlighted_item_ids
+
+                for category_name, (category_label, category_view) in self.item_category_nodes.items():
+                    category_item_counts = self.ctx.received_item_counts_by_category.get(category_name, {})
+                    if not search_changed and changed_ids.isdisjoint(category_item_counts) and category_view.data:
+                        continue
 
-                                                if location_button.victory and "__Victory__" in self.ctx.tracker_reachable_events:
-                                                    location_button.background_color = self.ctx.colors['location_in_logic']
-                                                    reachable_count += 1
+                    category_count = 0
+                    data = []
+                    for item_id in sorted(category_item_counts):
+                        row = self.item_rows[item_id]
+                        # if the player is searching for text and neither the item name nor its categories contain it, skip it
+                        if matching_item_ids is not None and item_id not in matching_item_ids:
+                            continue
 
-                                                continue
+                        data.append({"text": row["text"], "bold": row["bold"], "item_id": item_id})
+                        category_count += row["count"]
 
-                                        if location_button.id and location_button.id not in self.ctx.missing_locations:
-                                            import logging
+                    category_view.data = data
 
-                                            logging.info("location button being removed: " + location_button.text)
-                                            buttons_to_remove.append(location_button)
-                                            continue
+                    category_text = "%s (%s)" % (category_name, category_count)
+                    if update_highlights:
+                        category_label.bold = category_label.text != category_text
+                    category_label.text = category_text
 
-                                        was_reachable = False
+                    category_view.size = (Window.width / 2, self.get_category_view_height(len(data)))
 
-                                        if location_button.text in self.ctx.tracker_reachable_locations:
-                                            location_button.background_color = self.ctx.colors['location_in_logic']
-                                            was_reachable = True
-                                        else:
-                                            location_button.background_color = self.ctx.colors['location_default']
+            def get_location_color(self, reachable: bool) -> list[float]:
+                return self.ctx.colors['location_in_logic'] if reachable else self.ctx.colors['location_default']
 
-                                        # if the player is searching for text and the location name doesn't contain it, hide and disable it
-                                        if self.ctx.search_term and not self.ctx.search_term.lower() in location_button.text.lower():
-                                            hide_button_during_search(location_button)
-                                        else:
-                                            show_button_during_search(location_button)
+            def update_location_tracker(self, locations_length: int, matching_location_ids: Optional[set[int]]):
+                """Brings the location rows in line with the missing locations, the search and the tracker's reachability.
+                Only rows whose reachability changed get recolored, and only categories with a changed row get refreshed."""
+                if self.locations_remaining_label is None:
+                    return
 
-                                            if was_reachable:
-                                                reachable_count += 1
+                self.locations_remaining_label.text = "Remaining Locations (%d)" % (locations_length)
+                search_term = self.ctx.location_search_index.term
+                search_changed = search_term != self.location_search_term
+                self.location_search_term = search_term
+
+                changed_ids = self.ctx.tracker_reachability_changes
+                self.ctx.tracker_reachability_changes = set()
+                reachable_ids = self.ctx.tracker_reachable_location_ids
+
+                for location_id in changed_ids:
+                    if location_id in self.location_rows:
+                        self.location_rows[location_id]["background_color"] = self.get_location_color(location_id in reachable_ids)
+
+                victory_reachable = "__Victory__" in self.ctx.tracker_reachable_events
+                victory_changed = victory_reachable != self.victory_reachable
+                if victory_changed:
+                    self.victory_reachable = victory_reachable
+                    self.victory_row["background_color"] = self.get_location_color(victory_reachable)
+
+                for category_name, (category_label, category_view) in self.location_category_nodes.items():
+                    listed_locations = self.listed_locations[category_name]
+                    # checked locations are dropped from their categories for good, even before the server confirms them
+                    still_missing = [location_id for location_id in listed_locations
+                                     if location_id in self.ctx.missing_locations and location_id not in self.ctx.locations_checked]
+                    has_victory = category_name in self.victory_categories
+
+                    if not search_changed and len(still_missing) == len(listed_locations) \
+                            and not (has_victory and victory_changed) and changed_ids.isdisjoint(listed_locations):
+                        continue
 
-                                            category_count += 1
+                    self.listed_locations[category_name] = still_missing
+                    category_count = 0
+                    reachable_count = 0
+                    data = []
 
-                                for location_button in buttons_to_remove:
-                                    location_button.parent.remove_widget(location_button)
+                    for location_id in still_missing:
+                        # if the player is searching for text and neither the location name nor its categories contain it, leave it out
+                        if matching_location_ids is not None and location_id not in matching_location_ids:
+                            continue
 
-                                scrollview_height = 30 * category_count
+                        data.append(self.location_rows[location_id])
+                        category_count += 1
+                        if location_id in reachable_ids:
+                            reachable_count += 1
 
-                                if scrollview_height > 250:
-                                    scrollview_height = 250
+                    if has_victory and (not search_term or search_term in self.victory_row["text"].lower()):
+                        data.append(self.victory_row)
+                        category_count += 1
+                        if victory_reachable:
+                            reachable_count += 1
 
-                                if scrollview_height < 10:
-                                    scrollview_height = 50
+                    category_view.data = data
+                    # rows are updated in place, so the view has to be told even when the list itself looks unchanged
+                    category_view.refresh_from_data()
 
-                                count_text = category_count
+                    count_text = category_count
 
-                                if tracker_loaded:
-                                    count_text = "{}/{}".format(reachable_count, category_count)
+                    if self.ctx.tracker_loaded or self.ctx.local_logic:
+                        count_text = "{}/{}".format(reachable_count, category_count)
 
-                                category_name = re.sub(r"\s\(\d+\/?(\d+)?\)$", "", category_label.text)
-                                category_label.text = "%s (%s)" % (category_name, count_text)
+                    category_label.text = "%s (%s)" % (category_name, count_text)
 
-                                if reachable_count > 0:
-                                    # treeviewlabels don't have background color. because #justkivythings.
-                                    category_label.even_color = self.ctx.colors['category_in_logic']
-                                    category_label.odd_color = self.ctx.colors['category_in_logic']
-                                else:
-                                    category_label.even_color = self.ctx.colors['category_even_default']
-                                    category_label.odd_color = self.ctx.colors['category_odd_default']
+                    if reachable_count > 0:
+                        # treeviewlabels don't have background color. because #justkivythings.
+                        category_label.even_color = self.ctx.colors['category_in_logic']
+                        category_label.odd_color = self.ctx.colors['category_in_logic']
+                    else:
+                        category_label.even_color = self.ctx.colors['category_even_default']
+                        category_label.odd_color = self.ctx.colors['category_odd_default']
 
-                                category_scrollview.size=(Window.width / 2, scrollview_height)
+                    category_view.size = (Window.width / 2, self.get_category_view_height(len(data)))
 
             def location_button_callback(self, location_id, button):
                 if button.text not in self.ctx.location_names_to_id:
                     raise Exception("Locations were not loaded correctly. Please reconnect your client.")
 
                 if location_id:
-                    self.ctx.locations_checked.append(location_id)
-                    self.ctx.syncing = True
-                    button.parent.remove_widget(button)
+                    self.ctx.queue_location_check(location_id)
+                    # the button is recycled, so it's the location's row that gets removed right away; the counts catch up on the next update
+                    for category_name, (_, category_view) in self.location_category_nodes.items():
+                        if location_id in self.listed_locations[category_name]:
+                            category_view.data = [row for row in category_view.data if row["location_id"] != location_id]
+                    self.request_update_tracker_and_locations_table()
 
                     # message = [{"cmd": 'LocationChecks', "locations": [location_id]}]
                     # self.ctx.send_msgs(message)
 
             def victory_button_callback(self, button):
-                self.ctx.items_received.append("__Victory__")
-                self.ctx.syncing = True
+                self.ctx.queue_victory()
 
         return ManualManager
 
 async def game_watcher_manual(ctx: ManualContext):
+    """Sends queued location checks, syncs, goal and death link updates. It sleeps until something is queued,
+    then waits a short window so checks made in quick succession are coalesced into a single LocationChecks."""
+    exit_wait = asyncio.create_task(ctx.exit_event.wait())
+    try:
+        while not ctx.exit_event.is_set():
+            send_wait = asyncio.create_task(ctx.send_requested.wait())
+            await asyncio.wait({send_wait, exit_wait}, return_when=asyncio.FIRST_COMPLETED)
+            send_wait.cancel()
+            if ctx.exit_event.is_set():
+                break
+
+            await asyncio.sleep(ctx.location_check_coalesce_window)
+            ctx.send_requested.clear()
+
+            messages = []
+            if ctx.syncing:
+                messages.append({'cmd': 'Sync'})
+                ctx.syncing = False
+            if ctx.pending_location_checks:
+                messages.append({"cmd": "LocationChecks", "locations": sorted(ctx.pending_location_checks)})
+                ctx.pending_location_checks.clear()
+            if ctx.victory_pending and not ctx.finished_game:
+                messages.append({"cmd": "StatusUpdate", "status": ClientStatus.CLIENT_GOAL})
+                ctx.finished_game = True
+            if messages:
+                await ctx.send_msgs(messages)
+
+            if ctx.set_deathlink:
+                ctx.set_deathlink = False
+                await ctx.update_death_link(True)
+
+            if ctx.deathlink_out:
+                ctx.deathlink_out = False
+                await ctx.send_death()
+    finally:
+        exit_wait.cancel()
+
+
+async def headless_location_reader(ctx: ManualContext, source: str):
+    """Reads location checks for headless mode, one location name or id per line, from a file or from stdin ("-").
+    The victory location's name (or "__Victory__") marks the goal as complete. Checks are queued like button clicks,
+    so the sender batches them into LocationChecks. The client exits once the input ends and everything was sent."""
+    while not ctx.slot and not ctx.exit_event.is_set():
+        await asyncio.sleep(0.1)
+
+    loop = asyncio.get_running_loop()
+    input_file = sys.stdin if source == "-" else open(source, 'r')
+    lines: asyncio.Queue[Optional[str]] = asyncio.Queue()
+
+    def read_lines():
+        # a blocked readline() can't be interrupted, so this runs in a daemon thread that can't keep the client from exiting
+        try:
+            for line in iter(input_file.readline, ""):
+                loop.call_soon_threadsafe(lines.put_nowait, line)
+            loop.call_soon_threadsafe(lines.put_nowait, None)
+        except (RuntimeError, ValueError, OSError):
+            pass  # the client already exited
+        finally:
+            if input_file is not sys.stdin:
+                input_file.close()
+
+    threading.Thread(target=read_lines, name="ManualHeadlessInput", daemon=True).start()
+
     while not ctx.exit_event.is_set():
-        if ctx.ui:
-            ctx.ui.check_for_requested_update()
-
-        if ctx.syncing == True:
-            sync_msg = [{'cmd': 'Sync'}]
-            if ctx.locations_checked:
-                sync_msg.append({"cmd": "LocationChecks", "locations": list(ctx.locations_checked)})
-            await ctx.send_msgs(sync_msg)
-            ctx.syncing = False
-
-        if ctx.set_deathlink:
-            ctx.set_deathlink = False
-            await ctx.update_death_link(True)
-
-        if ctx.deathlink_out:
-            ctx.deathlink_out = False
-            await ctx.send_death()
-
-        sending = []
-        victory = ("__Victory__" in ctx.items_received)
-        ctx.locations_checked = sending
-        message = [{"cmd": 'LocationChecks', "locations": sending}]
-        await ctx.send_msgs(message)
-        if not ctx.finished_game and victory:
-            await ctx.send_msgs([{"cmd": "StatusUpdate", "status": ClientStatus.CLIENT_GOAL}])
-            ctx.finished_game = True
+        line = await lines.get()
+        if line is None:
+            break
+        line = line.strip()
+        if not line:
+            continue
+
+        if line == "__Victory__" or line in ctx.victory_names:
+            ctx.queue_victory()
+            continue
+
+        location_id = ctx.resolve_location_check(line)
+        if location_id is None:
+            logger.warning(f"Unknown location: {line}")
+            continue
+        ctx.queue_location_check(location_id)
+
+    # let the sender flush whatever is still queued before leaving
+    while (ctx.pending_location_checks or ctx.send_requested.is_set()) and not ctx.exit_event.is_set():
         await asyncio.sleep(0.1)
+    ctx.exit_event.set()
+
+
+def move_console_logging_to_stderr():
+    """Points every logging handler that writes to stdout at stderr instead, so stdout only carries the headless output"""
+    for handler in logging.getLogger().handlers:
+        if type(handler) is logging.StreamHandler and handler.stream in (sys.stdout, sys.__stdout__):
+            handler.setStream(sys.stderr)
 
 
 def read_apmanual_file(apmanual_file):
@@ -896,11 +1133,31 @@ def read_apmanual_file(apmanual_file):
         return json.loads(b64decode(f.read()))
 
 
+def get_context_class() -> typing.Type[ManualContext]:
+    """Returns the client context with Universal Tracker mixed in, or ManualContext itself if UT isn't installed.\n
+    UT's context loads the GUI as it's imported, so only the GUI client calls this, never headless mode."""
+    try:
+        from worlds.tracker.TrackerClient import TrackerGameContext, TrackerCommandProcessor
+    except ModuleNotFoundError:
+        return ManualContext
+
+    class TrackerManualCommandProcessor(ManualClientCommandProcessor, TrackerCommandProcessor):
+        pass
+
+    class TrackerManualContext(ManualContext, TrackerGameContext):
+        command_processor = TrackerManualCommandProcessor
+        tracker_loaded = True
+
+    return TrackerManualContext
+
+
 async def main(args):
     config_file = {}
     if args.apmanual_file:
         config_file = read_apmanual_file(args.apmanual_file)
-    ctx = ManualContext(args.connect, args.password, config_file.get("game"), config_file.get("player_name"))
+    context_class = ManualContext if args.headless else get_context_class()
+    ctx = context_class(args.connect, args.password, config_file.get("game"), config_file.get("player_name"))
+    ctx.headless = args.headless
     ctx.server_task = asyncio.create_task(server_loop(ctx), name="server loop")
 
     ctx.item_table = config_file.get("items", {})
@@ -908,11 +1165,23 @@ async def main(args):
     ctx.region_table = config_file.get("regions", {})
     ctx.category_table = config_file.get("categories", {})
 
-    if tracker_loaded:
-        ctx.run_generator()
-    if gui_enabled:
-        ctx.run_gui()
-    ctx.run_cli()
+    location_reader = None
+    if ctx.headless:
+        if args.output == "-":
+            move_console_logging_to_stderr()
+        else:
+            ctx.headless_output = open(args.output, 'w')
+        # no UI, no Universal Tracker and no console when the checks come from stdin
+        if args.checks != "-":
+            ctx.run_cli()
+        location_reader = asyncio.create_task(
+            headless_location_reader(ctx, args.checks), name="ManualHeadlessLocationReader")
+    else:
+        if ctx.tracker_loaded:
+            ctx.run_generator()
+        if gui_enabled:
+            ctx.run_gui()
+        ctx.run_cli()
     progression_watcher = asyncio.create_task(
         game_watcher_manual(ctx), name="ManualProgressionWatcher")
 
@@ -920,8 +1189,12 @@ async def main(args):
     ctx.server_address = None
 
     await progression_watcher
+    if location_reader:
+        location_reader.cancel()
 
     await ctx.shutdown()
+    if ctx.headless_output is not sys.stdout:
+        ctx.headless_output.close()
 
 def launch() -> None:
     import colorama
@@ -929,6 +1202,12 @@ def launch() -> None:
     parser = get_base_parser(description="Manual Client, for operating a Manual game in Archipelago.")
     parser.add_argument('apmanual_file', default="", type=str, nargs="?",
                         help='Path to an APMANUAL file')
+    parser.add_argument('--headless', default=False, action='store_true',
+                        help='Run without the GUI: read location checks from --checks and write received items to --output as JSON lines')
+    parser.add_argument('--checks', default="-", type=str,
+                        help='File to read location names or ids from in headless mode, one per line ("-" for stdin)')
+    parser.add_argument('--output', default="-", type=str,
+                        help='File to write received items to in headless mode ("-" for stdout, in which case logging goes to stderr)')
 
     args = sys.argv[1:]
     if "Manual Client" in args:
@@ -0,0 +1,69 @@
+from collections import deque
+from typing import Iterable
+
+from BaseClasses import Region
+
+
+class RegionGraph:
+    """Directed graph of region names, where an edge A -> B means region A has an exit into region B.\n
+    It can be built either from the raw region data (regions.json) or from the regions that were actually created,
+    which includes any rewiring done by hooks. Every traversal below is iterative, so deep region chains are fine."""
+
+    def __init__(self, edges: dict[str, Iterable[str]]):
+        self.successors: dict[str, list[str]] = {}
+        self.predecessors: dict[str, list[str]] = {}
+
+        for region_name, connected_names in edges.items():
+            self.add_region(region_name)
+            for connected_name in connected_names:
+                self.add_edge(region_name, connected_name)
+
+    @classmethod
+    def from_region_table(cls, region_table: dict[str, dict]) -> "RegionGraph":
+        """Builds the graph from region data in the regions.json format, using each region's connects_to"""
+        return cls({name: region.get("connects_to") or [] for name, region in region_table.items()})
+
+    @classmethod
+    def from_regions(cls, regions: Iterable[Region]) -> "RegionGraph":
+        """Builds the graph from created regions, following the exits that are actually connected"""
+        return cls({region.name: [exit.connected_region.name for exit in region.exits if exit.connected_region]
+                    for region in regions})
+
+    def add_region(self, region_name: str):
+        self.successors.setdefault(region_name, [])
+        self.predecessors.setdefault(region_name, [])
+
+    def add_edge(self, from_region: str, to_region: str):
+        self.add_region(from_region)
+        self.add_region(to_region)
+        self.successors[from_region].append(to_region)
+        self.predecessors[to_region].append(from_region)
+
+    @property
+    def region_names(self) -> set[str]:
+        return set(self.successors)
+
+    @staticmethod
+    def _walk(adjacency: dict[str, list[str]], start_names: Iterable[str]) -> set[str]:
+        found = {name for name in start_names if name in adjacency}
+        queue = deque(found)
+
+        while queue:
+            for next_name in adjacency[queue.popleft()]:
+                if next_name not in found:
+                    found.add(next_name)
+                    queue.append(next_name)
+
+        return found
+
+    def reachable_from(self, start_names: Iterable[str]) -> set[str]:
+        """Returns every region that can be reached from any of the start regions, including the start regions themselves"""
+        return self._walk(self.successors, start_names)
+
+    def unreachable_from(self, start_names: Iterable[str]) -> set[str]:
+        """Returns every region that can never be reached from any of the start regions"""
+        return self.region_names - self.reachable_from(start_names)
+
+    def ancestors_of(self, region_names: Iterable[str]) -> set[str]:
+        """Returns every region that leads to any of the given regions, including the given regions themselves"""
+        return self._walk(self.predecessors, region_names)
@@ -3,6 +3,7 @@ from .Helpers import is_category_enabled, is_location_enabled
 from .Data import region_table
 from .Locations import ManualLocation, location_name_to_location
 from worlds.AutoWorld import World
+from .hooks.World import before_create_region_connections
 
 
 if not region_table:
@@ -21,16 +22,14 @@ regionMap["Manual"] = {
 
 
 def create_regions(world: World, multiworld: MultiWorld, player: int):
+    # Work out every connection first, so only the entrances that are actually used get created
+    connections = {region: list(regionMap[region].get("connects_to") or []) for region in regionMap}
+    connections = before_create_region_connections(connections, world, multiworld, player)
+    world.region_connections = connections
+
     # Create regions and assign locations to each region
     for region in regionMap:
-        if "connects_to" not in regionMap[region]:
-            exit_array = None
-        else:
-            exit_array = regionMap[region]["connects_to"] or None
-
-        # safeguard for bad value at the end
-        if not exit_array:
-            exit_array = None
+        exit_array = connections.get(region) or None
 
         locations = []
         for location in world.location_table:
@@ -47,11 +46,10 @@ def create_regions(world: World, multiworld: MultiWorld, player: int):
     menuConn.connect(multiworld.get_region("Manual", player))
 
     # Link regions together
-    for region in regionMap:
-        if "connects_to" in regionMap[region] and regionMap[region]["connects_to"]:
-            for linkedRegion in regionMap[region]["connects_to"]:
-                connection = multiworld.get_entrance(getConnectionName(region, linkedRegion), player)
-                connection.connect(multiworld.get_region(linkedRegion, player))
+    for region, linkedRegions in connections.items():
+        for linkedRegion in linkedRegions:
+            connection = multiworld.get_entrance(getConnectionName(region, linkedRegion), player)
+            connection.connect(multiworld.get_region(linkedRegion, player))
 
 def create_region(world: World, multiworld: MultiWorld, player: int, name: str, locations=None, exits=None):
     ret = Region(name, player, multiworld)
@@ -68,5 +66,34 @@ def create_region(world: World, multiworld: MultiWorld, player: int, name: str,
             ret.exits.append(Entrance(player, getConnectionName(name, exit), ret))
     return ret
 
+def prune_regions(world: World, multiworld: MultiWorld, player: int, region_names: list[str]):
+    """Remove the named regions of this player, along with their locations and every entrance and exit connected to them."""
+    region_cache = multiworld.regions.region_cache[player]
+    entrance_cache = multiworld.regions.entrance_cache[player]
+    location_cache = multiworld.regions.location_cache[player]
+
+    for region_name in set(region_names):
+        region = region_cache.pop(region_name, None)
+        if region is None:
+            continue
+
+        for entrance in region.entrances + region.exits:
+            if entrance in entrance.parent_region.exits:
+                entrance.parent_region.exits.remove(entrance)
+            if entrance.connected_region and entrance in entrance.connected_region.entrances:
+                entrance.connected_region.entrances.remove(entrance)
+            entrance_cache.pop(entrance.name, None)
+
+        item_index = getattr(world, "item_index", None)
+        for location in region.locations:
+            location_cache.pop(location.name, None)
+            # an item placed there leaves the multiworld with its location
+            if item_index is not None and location.item and location.item.player == player:
+                item_index.remove(location.item)
+
+        region.entrances.clear()
+        region.exits.clear()
+        region.locations.clear()
+
 def getConnectionName(entranceName: str, exitName: str):
     return entranceName + "To" + exitName
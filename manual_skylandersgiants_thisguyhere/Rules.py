@@ -1,11 +1,11 @@
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Callable, Optional
 from enum import IntEnum
 from operator import eq, ge, le
 
 from .Regions import regionMap
 from .hooks import Rules
 from .Helpers import clamp, is_item_enabled, is_option_enabled, get_option_value, convert_string_to_type,\
-    format_to_valid_identifier, format_state_prog_items_key, ProgItemsCat
+    format_to_valid_identifier, format_state_prog_items_key, ProgItemsCat, get_state_version, get_state_rule_memo
 
 from BaseClasses import MultiWorld, CollectionState
 from worlds.AutoWorld import World
@@ -13,6 +13,7 @@ from worlds.generic.Rules import set_rule, add_rule
 from Options import Choice, Toggle, Range, NamedRange
 
 import re
+import json
 import math
 import inspect
 import logging
@@ -101,6 +102,103 @@ def evaluate_postfix(expr: str, location: str) -> bool:
 
     return stack.pop()
 
+class DictRequires:
+    """A list/dict form requires, parsed into (item name, count) pairs.\n
+    Plain entries must all be collected, or else at least one of the "or" groups (a list, or a dict with "or") must be fully collected.
+    An empty requires is always accessible."""
+
+    def __init__(self, requires: list):
+        required_counts: dict[str, int] = {}
+        groups: list[dict[str, int]] = []
+
+        for item in requires:
+            # if the require entry is an object with "or" or a list of items, treat it as a standalone require of its own
+            if (isinstance(item, dict) and "or" in item and isinstance(item["or"], list)) or (isinstance(item, list)):
+                or_items = item["or"] if isinstance(item, dict) else item
+                group: dict[str, int] = {}
+                for or_item in or_items:
+                    item_name, item_count = DictRequires.parse_item(or_item)
+                    group[item_name] = max(group.get(item_name, 0), item_count)
+                groups.append(group)
+            else:
+                item_name, item_count = DictRequires.parse_item(item)
+                required_counts[item_name] = max(required_counts.get(item_name, 0), item_count)
+
+        self.required_counts = required_counts
+        self.groups = tuple(groups)
+
+    @staticmethod
+    def parse_item(item: str) -> tuple[str, int]:
+        item_parts = item.split(":")
+        if len(item_parts) > 1:
+            return item_parts[0], int(item_parts[1])
+        return item, 1
+
+    def evaluate(self, state: CollectionState, player: int) -> bool:
+        if not self.required_counts or state.has_all_counts(self.required_counts, player):
+            return True
+
+        for group in self.groups:
+            if state.has_all_counts(group, player):
+                return True
+
+        return False
+
+def normalize_requires(requires: str | list) -> str:
+    """Returns the text a requires is interned by, so requires that only differ in whitespace or key order share a rule"""
+    if isinstance(requires, str):
+        return " ".join(requires.split())
+    return json.dumps(requires, sort_keys=True)
+
+# the built-in requires functions that only read items and options, so their results hold until the player's items change
+ITEM_ONLY_REQUIRES_FUNCTIONS = frozenset({"ItemValue", "OptOne", "OptAll", "YamlEnabled", "YamlDisabled", "YamlCompare"})
+
+def is_cacheable_requires(requires: str | list) -> bool:
+    """Check if a requires only calls functions that read items and options (including inside OptAll).
+    Any other function, like canReachLocation or a hook function, could read what's reachable instead."""
+    if not isinstance(requires, str):
+        return True
+    return all(func_name in ITEM_ONLY_REQUIRES_FUNCTIONS for func_name in re.findall(r"\{(\w+)\(", requires))
+
+class ManualRule:
+    """A compiled access rule, shared by every location and entrance whose requires normalize to the same key.\n
+    With use_memo, results are memoized on the CollectionState itself (see get_state_rule_memo), so repeated checks
+    during a sweep are dictionary hits until the player's items in that state change.
+    Otherwise only the last result is kept, along with the state and the player's state version it was checked against.\n
+    Rules that aren't cacheable (see is_cacheable_requires) are checked every time, since what's reachable
+    changes during a sweep without the player's items changing."""
+
+    def __init__(self, key, rule_id: int, player: int, check: Callable[[CollectionState], bool], use_memo: bool = False,
+                 cacheable: bool = True):
+        self.key = key
+        self.rule_id = rule_id
+        self.player = player
+        self.check = check
+        self.use_memo = use_memo
+        self.cacheable = cacheable
+        self.cached_state: Optional[CollectionState] = None
+        self.cached_version = -1
+        self.cached_result = False
+
+    def __call__(self, state: CollectionState) -> bool:
+        if not self.cacheable:
+            return self.check(state)
+
+        if self.use_memo:
+            memo = get_state_rule_memo(state, self.player)
+            result = memo.get(self.rule_id)
+            if result is None:
+                result = memo[self.rule_id] = self.check(state)
+            return result
+
+        version = get_state_version(state, self.player)
+        if self.cached_state is state and self.cached_version == version:
+            return self.cached_result
+
+        result = self.check(state)
+        self.cached_state, self.cached_version, self.cached_result = state, version, result
+        return result
+
 def set_rules(world: "ManualWorld", multiworld: MultiWorld, player: int):
     # this is only called when the area (think, location or region) has a "requires" field that is a string
     def checkRequireStringForArea(state: CollectionState, area: dict):
@@ -224,47 +322,19 @@ def set_rules(world: "ManualWorld", multiworld: MultiWorld, player: int):
         requires_string = infix_to_postfix("".join(requires_list), area)
         return (evaluate_postfix(requires_string, area))
 
-    # this is only called when the area (think, location or region) has a "requires" field that is a dict
-    def checkRequireDictForArea(state: CollectionState, area: dict):
-        canAccess = True
-
-        for item in area["requires"]:
-            # if the require entry is an object with "or" or a list of items, treat it as a standalone require of its own
-            if (isinstance(item, dict) and "or" in item and isinstance(item["or"], list)) or (isinstance(item, list)):
-                canAccessOr = True
-                or_items = item
-
-                if isinstance(item, dict):
-                    or_items = item["or"]
-
-                for or_item in or_items:
-                    or_item_parts = or_item.split(":")
-                    or_item_name = or_item
-                    or_item_count = 1
+    # list/dict form requires are parsed once, the first time they're seen, and keyed by the requires object itself
+    compiled_dict_requires: dict[int, DictRequires] = {}
 
-                    if len(or_item_parts) > 1:
-                        or_item_name = or_item_parts[0]
-                        or_item_count = int(or_item_parts[1])
-
-                    if not state.has(or_item_name, player, or_item_count):
-                        canAccessOr = False
-
-                if canAccessOr:
-                    canAccess = True
-                    break
-            else:
-                item_parts = item.split(":")
-                item_name = item
-                item_count = 1
+    def getCompiledDictRequires(requires: list) -> "DictRequires":
+        compiled = compiled_dict_requires.get(id(requires))
+        if compiled is None:
+            compiled = DictRequires(requires)
+            compiled_dict_requires[id(requires)] = compiled
+        return compiled
 
-                if len(item_parts) > 1:
-                    item_name = item_parts[0]
-                    item_count = int(item_parts[1])
-
-                if not state.has(item_name, player, item_count):
-                    canAccess = False
-
-        return canAccess
+    # this is only called when the area (think, location or region) has a "requires" field that is a dict
+    def checkRequireDictForArea(state: CollectionState, area: dict):
+        return getCompiledDictRequires(area["requires"]).evaluate(state, player)
 
     # handle any type of checking needed, then ferry the check off to a dedicated method for that check
     def fullLocationOrRegionCheck(state: CollectionState, area: dict):
@@ -281,27 +351,61 @@ def set_rules(world: "ManualWorld", multiworld: MultiWorld, player: int):
         else:  # item access is in dict form
             return checkRequireDictForArea(state, area)
 
+    # Every YamlCompare only depends on the player's options, so each one is parsed here and resolved once, the first time it's checked
+    for area in list(regionMap.values()) + world.location_table:
+        for requires in [area.get("requires")] + list((area.get("entrance_requires") or {}).values()) + list((area.get("exit_requires") or {}).values()):
+            if isinstance(requires, str):
+                for args in re.findall(r"\{YamlCompare\((.*?)\)\}", requires):
+                    get_yaml_compare_predicate(world, args)
+
+    # Parse every list/dict form requires up front, so checking them never has to split "Item:count" again
+    for area in list(regionMap.values()) + world.location_table:
+        if "requires" in area and not isinstance(area["requires"], str):
+            getCompiledDictRequires(area["requires"])
+
+    # Every distinct requires gets one rule object, shared by all the locations and entrances that use it
+    interned_rules: dict = {}
+
+    def internRule(key, check: Callable[[CollectionState], bool], cacheable: bool = True) -> ManualRule:
+        rule = interned_rules.get(key)
+        if rule is None:
+            rule = interned_rules[key] = ManualRule(key, len(interned_rules), player, check, world.use_rule_memo, cacheable)
+        return rule
+
+    def getAreaRule(area: dict) -> ManualRule:
+        # the first area with a given requires is the one named in any logic error it raises
+        if "requires" not in area:
+            return internRule(("area", None), lambda state: True)
+        return internRule(("area", normalize_requires(area["requires"])),
+                          lambda state, area=area: fullLocationOrRegionCheck(state, area), is_cacheable_requires(area["requires"]))
+
     used_location_names = []
+    # regions pruned before set_rules are skipped entirely, along with any entrance/exit rule pointing at them
+    # or at a connection the before_create_region_connections hook removed
+    player_region_names = {region.name for region in multiworld.get_regions(player)}
     # Region access rules
     for region in regionMap.keys():
+        if region not in player_region_names:
+            continue
         used_location_names.extend([l.name for l in multiworld.get_region(region, player).locations])
         if region != "Menu":
+            regionMap[region]['name'] = region
+            regionMap[region]['is_region'] = True
+            regionRule = getAreaRule(regionMap[region])
             for exitRegion in multiworld.get_region(region, player).entrances:
-                def fullRegionCheck(state: CollectionState, region=regionMap[region], region_name=exitRegion.name):
-                    region['name'] = region_name
-                    region['is_region'] = True
-
-                    return fullLocationOrRegionCheck(state, region)
-
-                add_rule(world.get_entrance(exitRegion.name), fullRegionCheck)
+                add_rule(world.get_entrance(exitRegion.name), regionRule)
             entrance_rules = regionMap[region].get("entrance_requires", {})
             for e in entrance_rules:
+                if e not in player_region_names or region not in world.region_connections.get(e, []):
+                    continue
                 entrance = world.get_entrance(f'{e}To{region}')
-                add_rule(entrance, lambda state, rule={"requires": entrance_rules[e]}: fullLocationOrRegionCheck(state, rule))
+                add_rule(entrance, getAreaRule({"name": f'{e}To{region}', "requires": entrance_rules[e]}))
             exit_rules = regionMap[region].get("exit_requires", {})
             for e in exit_rules:
+                if e not in player_region_names or e not in world.region_connections.get(region, []):
+                    continue
                 exit = world.get_entrance(f'{region}To{e}')
-                add_rule(exit, lambda state, rule={"requires": exit_rules[e]}: fullLocationOrRegionCheck(state, rule))
+                add_rule(exit, getAreaRule({"name": f'{region}To{e}', "requires": exit_rules[e]}))
 
     # Location access rules
     for location in world.location_table:
@@ -317,26 +421,18 @@ def set_rules(world: "ManualWorld", multiworld: MultiWorld, player: int):
             locationRegion['is_region'] = True
 
         if "requires" in location: # Location has requires, check them alongside the region requires
-            def checkBothLocationAndRegion(state: CollectionState, location=location, region=locationRegion):
-                locationCheck = fullLocationOrRegionCheck(state, location)
-                regionCheck = True # default to true unless there's a region with requires
-
-                if region:
-                    regionCheck = fullLocationOrRegionCheck(state, region)
-
-                return locationCheck and regionCheck
-
-            set_rule(locFromWorld, checkBothLocationAndRegion)
+            locationRule = getAreaRule(location)
+            if locationRegion:
+                regionRule = getAreaRule(locationRegion)
+                set_rule(locFromWorld, internRule(("both", locationRule.key, regionRule.key),
+                    lambda state, locationRule=locationRule, regionRule=regionRule: locationRule(state) and regionRule(state),
+                    locationRule.cacheable and regionRule.cacheable))
+            else:
+                set_rule(locFromWorld, locationRule)
         elif "region" in location: # Only region access required, check the location's region's requires
-            def fullRegionCheck(state, region=locationRegion):
-                return fullLocationOrRegionCheck(state, region)
-
-            set_rule(locFromWorld, fullRegionCheck)
+            set_rule(locFromWorld, getAreaRule(locationRegion))
         else: # No location region and no location requires? It's accessible.
-            def allRegionsAccessible(state):
-                return True
-
-            set_rule(locFromWorld, allRegionsAccessible)
+            set_rule(locFromWorld, getAreaRule({}))
 
     # Victory requirement
     multiworld.completion_condition[player] = lambda state: state.has("__Victory__", player)
@@ -483,12 +579,12 @@ def YamlDisabled(multiworld: MultiWorld, player: int, param: str) -> bool:
     """Is a yaml option disabled?"""
     return not is_option_enabled(multiworld, player, param)
 
-def YamlCompare(world: "ManualWorld", multiworld: MultiWorld, state: CollectionState, player: int, args: str, skipCache: bool = False) -> bool:
-    """Is a yaml option's value compared using {comparator} to the requested value
-    \nFormat it like {YamlCompare(OptionName==value)}
-    \nWhere == can be any of the following: ==, !=, >=, <=, <, >
-    \nExample: {YamlCompare(Example_Range > 5)}"""
-    comp_symbols = { #Maybe find a better name for this
+class YamlComparePredicate:
+    """The parsed form of a YamlCompare argument like 'Example_Range > 5'.\n
+    Parsing is done once per argument string and world (see get_yaml_compare_predicate),
+    and resolving the requested value (including named values/aliases of Choice and NamedRange) once per option class.
+    Evaluating it against a world only compares the option's value."""
+    comparators = { #Maybe find a better name for this
         '==' : eq,
         '!=' : eq, #complement of ==
         '>=' : ge,
@@ -497,65 +593,53 @@ def YamlCompare(world: "ManualWorld", multiworld: MultiWorld, state: CollectionS
         '<' : ge, #complement of >=
         '>' : le, #complement of <=
     }
+    reversed_comparators = {'!=', '<', '>'}
 
-    reverse_result = False
-
-    #Find the comparator symbol to split the string with and for logs
-    if '==' in args:
-        comparator = '=='
-    elif '!=' in args:
-        comparator = '!='
-        reverse_result = True #complement of == thus reverse by default
-    elif '>=' in args:
-        comparator = '>='
-    elif '<=' in args:
-        comparator = '<='
-    elif '=' in args:
-        comparator = '='
-    elif '<' in args:
-        comparator = '<'
-        reverse_result = True #complement of >=
-    elif '>' in args:
-        comparator = '>'
-        reverse_result = True #complement of <=
-    else:
-        raise  ValueError(f"Could not find a valid comparator in given string '{args}', it must be one of {comp_symbols.keys()}")
+    def __init__(self, args: str):
+        self.args = args
+        self.reverse_result = False
 
-    option_name, value = args.split(comparator)
+        #Find the comparator symbol to split the string with and for logs, checked in the order of the dict so '==' wins over '='
+        comparator = next((symbol for symbol in self.comparators if symbol in args), None)
+        if comparator is None:
+            raise  ValueError(f"Could not find a valid comparator in given string '{args}', it must be one of {self.comparators.keys()}")
 
-    initial_option_name = str(option_name).strip() #For exception messages
-    option_name = format_to_valid_identifier(option_name)
+        self.comparator = comparator
+        self.compare = self.comparators[comparator]
+        self.reverse_result = comparator in self.reversed_comparators
 
-    # Detect !reversing of result like yaml_option
-    if option_name.startswith('!'):
-        reverse_result = not reverse_result
-        option_name = option_name.lstrip('!')
-        initial_option_name = initial_option_name.lstrip('!')
+        option_name, value = args.split(comparator)
 
-    value = value.strip()
+        self.initial_option_name = str(option_name).strip() #For exception messages
+        self.option_name = format_to_valid_identifier(option_name)
 
-    option = getattr(world.options, option_name, None)
-    if option is None:
-        raise ValueError(f"YamlCompare could not find an option called '{initial_option_name}' to compare against, its either missing on misspelt")
+        # Detect !reversing of result like yaml_option
+        if self.option_name.startswith('!'):
+            self.reverse_result = not self.reverse_result
+            self.option_name = self.option_name.lstrip('!')
+            self.initial_option_name = self.initial_option_name.lstrip('!')
 
-    if not value: #empty string ''
-        raise ValueError(f"Could not find a valid value to compare against in given string '{args}'. \nThere must be a value to compare against after the comparator (in this case '{comparator}').")
+        self.value = value.strip()
+        if not self.value: #empty string ''
+            raise ValueError(f"Could not find a valid value to compare against in given string '{args}'. \nThere must be a value to compare against after the comparator (in this case '{comparator}').")
 
-    if not skipCache: #Cache made for optimization purposes
-        cacheindex = option_name + '_' + comp_symbols[comparator].__name__ + '_' + format_to_valid_identifier(value.lower())
+        self._resolved_values: dict[type, int | str] = {}
 
-        if not hasattr(world, 'yaml_compare_rule_cache'):
-            world.yaml_compare_rule_cache = dict[str,bool]()
+    def resolve_value(self, option) -> int | str:
+        """Convert the requested value to what the option's class supports, the result is cached per option class"""
+        option_type = type(option)
+        if option_type in self._resolved_values:
+            return self._resolved_values[option_type]
 
-    if skipCache or world.yaml_compare_rule_cache.get(cacheindex, None) is None:
+        value = self.value
         try:
-            if issubclass(type(option), Choice):
+            if issubclass(option_type, Choice):
                 value = convert_string_to_type(value, str|int)
                 if isinstance(value, str):
                     value = option.from_text(value).value
 
-            elif issubclass(type(option), Range):
-                if type(option).__base__ == NamedRange:
+            elif issubclass(option_type, Range):
+                if option_type.__base__ == NamedRange:
                     value = convert_string_to_type(value, str|int)
                     if isinstance(value, str):
                         value = option.from_text(value).value
@@ -563,33 +647,54 @@ def YamlCompare(world: "ManualWorld", multiworld: MultiWorld, state: CollectionS
                 else:
                     value = convert_string_to_type(value, int)
 
-            elif issubclass(type(option), Toggle):
+            elif issubclass(option_type, Toggle):
                 value = int(convert_string_to_type(value, bool))
 
             else:
-                raise ValueError(f"YamlCompare does not currently support Option of type {type(option)} \nAsk about it in #Manual-dev and it might be added.")
+                raise ValueError(f"YamlCompare does not currently support Option of type {option_type} \nAsk about it in #Manual-dev and it might be added.")
 
         except KeyError as ex:
-            raise ValueError(f"YamlCompare failed to find the requested value in what the \"{initial_option_name}\" option supports.\
+            raise ValueError(f"YamlCompare failed to find the requested value in what the \"{self.initial_option_name}\" option supports.\
                 \nRaw error:\
                 \n\n{type(ex).__name__}:{ex}")
 
         except Exception as ex:
-            raise TypeError(f"YamlCompare failed to convert the requested value to what a {type(option).__base__.__name__} option supports.\
+            raise TypeError(f"YamlCompare failed to convert the requested value to what a {option_type.__base__.__name__} option supports.\
                 \nCaused By:\
                 \n\n{type(ex).__name__}:{ex}")
 
-        if isinstance(value, str) and comp_symbols[comparator].__name__ != 'eq':
+        if isinstance(value, str) and self.compare.__name__ != 'eq':
             #At this point if its still a string don't try and compare with strings using > < >= <=
-            raise ValueError(f'YamlCompare can only compare strings with one of the following: {[s for s, v in comp_symbols.items() if v.__name__ == "eq"]} and you tried to do: "{option.value} {comparator} {value}"')
+            raise ValueError(f'YamlCompare can only compare strings with one of the following: {[s for s, v in self.comparators.items() if v.__name__ == "eq"]} and you tried to do: "{option.value} {self.comparator} {value}"')
 
-        result = comp_symbols[comparator](option.value, value)
+        self._resolved_values[option_type] = value
+        return value
 
-        if not skipCache:
-            world.yaml_compare_rule_cache[cacheindex] = result
+    def evaluate(self, world: "ManualWorld") -> bool:
+        option = getattr(world.options, self.option_name, None)
+        if option is None:
+            raise ValueError(f"YamlCompare could not find an option called '{self.initial_option_name}' to compare against, its either missing on misspelt")
 
-    else: #if exists and not skipCache
-        result = world.yaml_compare_rule_cache[cacheindex]
+        result = self.compare(option.value, self.resolve_value(option))
+        return not result if self.reverse_result else result
 
-    return not result if reverse_result else result
+def get_yaml_compare_predicate(world: "ManualWorld", args: str) -> YamlComparePredicate:
+    """Returns the world's parsed predicate for a YamlCompare argument, parsing it if it wasn't already (like for a requires made by a hook function)"""
+    predicate = world.yaml_compare_predicates.get(args)
+    if predicate is None:
+        predicate = world.yaml_compare_predicates[args] = YamlComparePredicate(args)
+    return predicate
 
+def YamlCompare(world: "ManualWorld", multiworld: MultiWorld, state: CollectionState, player: int, args: str, skipCache: bool = False) -> bool:
+    """Is a yaml option's value compared using {comparator} to the requested value
+    \nFormat it like {YamlCompare(OptionName==value)}
+    \nWhere == can be any of the following: ==, !=, >=, <=, <, >
+    \nExample: {YamlCompare(Example_Range > 5)}"""
+    if skipCache:
+        return get_yaml_compare_predicate(world, args).evaluate(world)
+
+    result = world.yaml_compare_table.get(args)
+    if result is None:
+        result = get_yaml_compare_predicate(world, args).evaluate(world)
+        world.yaml_compare_table[args] = result
+    return result
@@ -2,7 +2,7 @@ from base64 import b64encode
 import logging
 import os
 import json
-from typing import Callable, Optional, Counter
+from typing import Callable, Iterable, Optional, Counter
 import webbrowser
 
 import Utils
@@ -13,21 +13,22 @@ from .Data import item_table, location_table, region_table, category_table
 from .Game import game_name, filler_item_name, starting_items
 from .Meta import world_description, world_webworld, enable_region_diagram
 from .Locations import location_id_to_name, location_name_to_id, location_name_to_location, location_name_groups, victory_names
-from .Items import item_id_to_name, item_name_to_id, item_name_to_item, item_name_groups
+from .Items import item_id_to_name, item_name_to_id, item_name_to_item, item_name_groups, item_name_to_classification
 from .DataValidation import runGenerationDataValidation, runPreFillDataValidation
 
-from .Regions import create_regions
-from .Items import ManualItem
-from .Rules import set_rules
+from .Regions import create_regions, prune_regions
+from .RegionGraph import RegionGraph
+from .Items import ManualItem, ManualItemIndex, ItemValueCache, item_name_to_value_keys
+from .Rules import set_rules, YamlComparePredicate
 from .Options import manual_options_data
-from .Helpers import is_item_enabled, get_option_value, get_items_for_player, resolve_yaml_option, format_state_prog_items_key, ProgItemsCat
+from .Helpers import is_item_enabled, get_option_value, get_items_for_player, resolve_yaml_option, format_state_prog_items_key, ProgItemsCat, is_passthrough_hook, bump_state_version
 
-from BaseClasses import CollectionState, ItemClassification, Item
+from BaseClasses import CollectionState, ItemClassification, Item, MultiWorld
 from Options import PerGameCommonOptions
 from worlds.AutoWorld import World
 
 from .hooks.World import \
-    hook_get_filler_item_name, before_create_regions, after_create_regions, \
+    hook_get_filler_item_name, before_create_regions, after_create_regions, hook_get_regions_to_prune, \
     before_create_items_all, before_create_items_starting, before_create_items_filler, after_create_items, \
     before_create_item, after_create_item, \
     before_set_rules, after_set_rules, \
@@ -55,6 +56,7 @@ class ManualWorld(World):
     item_name_to_id = item_name_to_id
     item_name_to_item = item_name_to_item
     item_name_groups = item_name_groups
+    item_name_to_classification = item_name_to_classification
 
     filler_item_name = filler_item_name
 
@@ -68,9 +70,38 @@ class ManualWorld(World):
     location_name_groups = location_name_groups
     victory_names = victory_names
 
+    item_index: Optional[ManualItemIndex] = None
+    """This player's items in the pool, placed at a location or precollected, built at the end of create_items and kept up to date after"""
+
+    item_value_cache: Optional[ItemValueCache] = None
+    """The values carried by this player's items (including precollected ones), fed and kept up to date by item_index"""
+
+    yaml_compare_table: dict[str, bool]
+    """The result of every {YamlCompare()} checked for this player, keyed by its argument string"""
+
+    yaml_compare_predicates: dict[str, YamlComparePredicate]
+    """Every {YamlCompare()} argument of this player's requires, parsed when the rules are set"""
+
+    pool_end: int = 0
+    """Where this player's pool ended in the multiworld itempool after create_items appended it. Its items can only move towards the start from there"""
+
+    region_connections: dict[str, list[str]]
+    """Every connection between this player's regions as created, after the before_create_region_connections hook"""
+
+    region_graph: RegionGraph
+    """The graph of this player's regions as they were created, kept up to date when regions are pruned"""
+
+    use_rule_memo = True
+    """Whether access rule results are memoized on each CollectionState until this player's items in it change"""
+
     # UT (the universal-est of trackers) can now generate without a YAML
     ut_can_gen_without_yaml = False  # Temporary disable until we fix the bugs with it
 
+    def __init__(self, multiworld: MultiWorld, player: int):
+        super().__init__(multiworld, player)
+        self.yaml_compare_table = {}
+        self.yaml_compare_predicates = {}
+
     def get_filler_item_name(self) -> str:
         return hook_get_filler_item_name(self, self.multiworld, self.player) or self.filler_item_name
 
@@ -109,6 +140,14 @@ class ManualWorld(World):
 
         after_create_regions(self, self.multiworld, self.player)
 
+        # Regions that the final region graph can never reach from Menu can't be used, whatever the items
+        self.region_graph = RegionGraph.from_regions(self.multiworld.get_regions(self.player))
+        unreachable_regions = self.region_graph.unreachable_from(["Menu"])
+        if unreachable_regions:
+            logging.info(f"{self.game} removed regions that cannot be reached for player {self.player}: {sorted(unreachable_regions)}")
+            prune_regions(self, self.multiworld, self.player, unreachable_regions)
+            self.region_graph = RegionGraph.from_regions(self.multiworld.get_regions(self.player))
+
     def create_items(self):
         # Generate item pool
         pool: list[Item] = []
@@ -138,9 +177,7 @@ class ManualWorld(World):
             total_created = 0
             if type(configs) is int:
                 total_created = configs
-                for _ in range(configs):
-                    new_item = self.create_item(name)
-                    pool.append(new_item)
+                pool.extend(self.create_item_batch([(name, configs)]))
             elif type(configs) is dict:
                 for cat, count in configs.items():
                     total_created += count
@@ -193,44 +230,9 @@ class ManualWorld(World):
 
         pool = before_create_items_starting(pool, self, self.multiworld, self.player)
 
-        items_started: list[Item] = []
-
-        if starting_items:
-            for starting_item_block in starting_items:
-                if not resolve_yaml_option(self.multiworld, self.player, starting_item_block):
-                    continue
-                # if there's a condition on having a previous item, check for any of them
-                # if not found in items started, this starting item rule shouldn't execute, and check the next one
-                if "if_previous_item" in starting_item_block:
-                    matching_items = [item for item in items_started if item.name in starting_item_block["if_previous_item"]]
-
-                    if len(matching_items) == 0:
-                        continue
-
-                # start with the full pool of items
-                items = pool
+        pool, items_started = self.pick_starting_items(pool)
 
-                # if the setting lists specific item names, limit the items to just those
-                if "items" in starting_item_block:
-                    items = [item for item in pool if item.name in starting_item_block["items"]]
-
-                # if the setting lists specific item categories, limit the items to ones that have any of those categories
-                if "item_categories" in starting_item_block:
-                    items_in_categories = [item["name"] for item in self.item_name_to_item.values() if "category" in item and len(set(starting_item_block["item_categories"]).intersection(item["category"])) > 0]
-                    items = [item for item in pool if item.name in items_in_categories]
-
-                self.random.shuffle(items)
-
-                # if the setting lists a specific number of random items that should be pulled, only use a subset equal to that number
-                if "random" in starting_item_block:
-                    items = items[0:starting_item_block["random"]]
-
-                for starting_item in items:
-                    items_started.append(starting_item)
-                    self.multiworld.push_precollected(starting_item)
-                    pool.remove(starting_item)
-
-        self.start_inventory = {i.name: items_started.count(i) for i in items_started}
+        self.start_inventory = Counter(item.name for item in items_started)
 
         pool = before_create_items_filler(pool, self, self.multiworld, self.player)
         pool = self.adjust_filler_items(pool, traps)
@@ -239,58 +241,96 @@ class ManualWorld(World):
         # need to put all of the items in the pool so we can have a full state for placement
         # then will remove specific item placements below from the overall pool
         self.multiworld.itempool += pool
+        self.pool_end = len(self.multiworld.itempool)
+
+        # the pool plus whatever got placed at this player's locations so far (like the victory item or items placed by hooks)
+        placed_items = [location.item for location in self.multiworld.get_locations(self.player) if location.item and location.item.player == self.player]
+        self.item_value_cache = ItemValueCache()
+        self.item_index = ManualItemIndex(pool + placed_items, self.multiworld.precollected_items.get(self.player, []), self.item_value_cache)
 
         real_pool = pool + items_started
         self.item_counts[self.player] = self.get_item_counts(pool=real_pool)
         self.item_counts_progression[self.player] = self.get_item_counts(pool=real_pool, only_progression=True)
 
     def create_item(self, name: str, class_override: Optional['ItemClassification']=None) -> Item:
-        name = before_create_item(name, self, self.multiworld, self.player)
+        if not is_passthrough_hook(before_create_item):
+            name = before_create_item(name, self, self.multiworld, self.player)
 
-        item = self.item_name_to_item[name]
         if class_override is not None:
             classification = class_override
         else:
-            classification = ItemClassification.filler
-
-            if "trap" in item and item["trap"]:
-                classification |= ItemClassification.trap
-
-            if "useful" in item and item["useful"]:
-                classification |= ItemClassification.useful
-
-            if "progression_skip_balancing" in item and item["progression_skip_balancing"]:
-                classification |= ItemClassification.progression_skip_balancing
-            elif "progression" in item and item["progression"]:
-                classification |= ItemClassification.progression
+            classification = self.item_name_to_classification[name]
 
         item_object = ManualItem(name, classification,
                         self.item_name_to_id[name], player=self.player)
 
-        item_object = after_create_item(item_object, self, self.multiworld, self.player)
+        if not is_passthrough_hook(after_create_item):
+            item_object = after_create_item(item_object, self, self.multiworld, self.player)
 
         return item_object
 
+    def create_item_batch(self, name_counts: Iterable[tuple[str, int]]) -> list[Item]:
+        """Creates every requested copy of each (item name, count) pair in one pass.\n
+        The item name hook and the classification are only resolved once per name, instead of once per item like create_item."""
+        items: list[Item] = []
+        # the item hooks are skipped entirely when they are left untouched
+        before_is_passthrough = is_passthrough_hook(before_create_item)
+        after_is_passthrough = is_passthrough_hook(after_create_item)
+        for name, count in name_counts:
+            if count <= 0:
+                continue
+
+            if not before_is_passthrough:
+                name = before_create_item(name, self, self.multiworld, self.player)
+            classification = self.item_name_to_classification[name]
+            item_id = self.item_name_to_id[name]
+
+            if after_is_passthrough:
+                items.extend([ManualItem(name, classification, item_id, player=self.player) for _ in range(count)])
+            else:
+                for _ in range(count):
+                    item_object = ManualItem(name, classification, item_id, player=self.player)
+                    items.append(after_create_item(item_object, self, self.multiworld, self.player))
+
+        return items
+
+    def create_item_sequence(self, names: Iterable[str]) -> list[Item]:
+        """Creates one item per given name, in the order the names are given, with every copy of a name made by create_item_batch.\n
+        Use it over create_item_batch when the order of the items matters, like for randomly drawn names that go into the item pool."""
+        names = list(names)
+        name_counts = Counter(names)
+        created = iter(self.create_item_batch(name_counts.items()))
+        copies_by_name = {name: [next(created) for _ in range(count)][::-1] for name, count in name_counts.items()}
+        return [copies_by_name[name].pop() for name in names]
+
     # Item Value need a tweaked collect and remove:
     def collect(self, state: CollectionState, item: Item) -> bool:
         change = super().collect(state, item)
-        manual_item = self.item_name_to_item.get(item.name, {})
-        if change and manual_item.get("value"):
-            for key, value in manual_item["value"].items():
-                state.prog_items[item.player][format_state_prog_items_key(ProgItemsCat.VALUE, key)] += int(value)
+        if change:
+            bump_state_version(state, item.player)
+        if change and item.name in item_name_to_value_keys:
+            for key, value in item_name_to_value_keys[item.name]:
+                state.prog_items[item.player][key] += value
         after_collect_item(self, state, change, item)
         return change
 
     def remove(self, state: CollectionState, item: Item) -> bool:
         change = super().remove(state, item)
-        manual_item = self.item_name_to_item.get(item.name, {})
-        if change and manual_item.get("value"):
-            for key, value in manual_item["value"].items():
-                state.prog_items[item.player][format_state_prog_items_key(ProgItemsCat.VALUE, key)] -= int(value)
+        if change:
+            bump_state_version(state, item.player)
+        if change and item.name in item_name_to_value_keys:
+            for key, value in item_name_to_value_keys[item.name]:
+                state.prog_items[item.player][key] -= value
         after_remove_item(self, state, change, item)
         return change
 
     def set_rules(self):
+        # Drop the regions the options left unused before any rule gets built for them
+        regions_to_prune = hook_get_regions_to_prune(self, self.multiworld, self.player)
+        if regions_to_prune:
+            prune_regions(self, self.multiworld, self.player, regions_to_prune)
+            self.region_graph = RegionGraph.from_regions(self.multiworld.get_regions(self.player))
+
         before_set_rules(self, self.multiworld, self.player)
 
         set_rules(self, self.multiworld, self.player)
@@ -298,59 +338,75 @@ class ManualWorld(World):
         after_set_rules(self, self.multiworld, self.player)
 
     def generate_basic(self):
+        # AP core removes start_inventory_from_pool items (and linked items) from the pool between create_items and here
+        if any(getattr(getattr(self.options, option_name, None), "value", None) for option_name in ("start_inventory_from_pool", "item_links")):
+            self.item_index.sync([item for item in self.multiworld.get_items() if item.player == self.player],
+                                 self.multiworld.precollected_items.get(self.player, []))
+        else:
+            self.item_index.sync_precollected(self.multiworld.precollected_items.get(self.player, []))
+
         before_generate_basic(self, self.multiworld, self.player)
 
+        # Index this player's unfilled locations and pool once, so placements only ever touch this player's items
+        unfilled_locations = [l for l in self.multiworld.get_locations(self.player) if l.item is None]
+        player_pool = [item for item in self.item_index.items.values() if item.location is None]
+        pool_index: dict[str, list[int]] = {}
+        for index, item in enumerate(player_pool):
+            pool_index.setdefault(item.name, []).append(index)
+        placed_indexes: set[int] = set()
+
         # Handle item forbidding
         manual_locations_with_forbid = {location['name']: location for location in location_name_to_location.values() if "dont_place_item" in location or "dont_place_item_category" in location}
-        locations_with_forbid = [l for l in self.multiworld.get_unfilled_locations(player=self.player) if l.name in manual_locations_with_forbid.keys()]
+        locations_with_forbid = [l for l in unfilled_locations if l.name in manual_locations_with_forbid]
         for location in locations_with_forbid:
             manual_location = manual_locations_with_forbid[location.name]
-            forbidden_item_names = []
+            forbidden_item_names = set()
 
             if manual_location.get("dont_place_item"):
-                forbidden_item_names.extend([i["name"] for i in item_name_to_item.values() if i["name"] in manual_location["dont_place_item"]])
+                forbidden_item_names.update(name for name in manual_location["dont_place_item"] if name in item_name_to_item)
 
             if manual_location.get("dont_place_item_category"):
-                forbidden_item_names.extend([i["name"] for i in item_name_to_item.values() if "category" in i and set(i["category"]).intersection(manual_location["dont_place_item_category"])])
+                forbidden_item_names.update(self.get_item_names_in_categories(manual_location["dont_place_item_category"]))
 
             if forbidden_item_names:
-                forbid_items_for_player(location, set(forbidden_item_names), self.player)
+                forbid_items_for_player(location, forbidden_item_names, self.player)
 
         # Handle specific item placements using fill_restrictive
         manual_locations_with_placements = {location['name']: location for location in location_name_to_location.values() if "place_item" in location or "place_item_category" in location}
-        locations_with_placements = [l for l in self.multiworld.get_unfilled_locations(player=self.player) if l.name in manual_locations_with_placements.keys()]
+        locations_with_placements = [l for l in unfilled_locations if l.name in manual_locations_with_placements]
         for location in locations_with_placements:
             manual_location = manual_locations_with_placements[location.name]
             eligible_items = []
-            eligible_item_names = []
-            forbidden_item_names = []
+            eligible_item_names = set()
+            forbidden_item_names = set()
             place_messages = []
             forbid_messages = []
 
             #First we get possible items names
             if manual_location.get("place_item"):
-                eligible_item_names += manual_location["place_item"]
+                eligible_item_names.update(manual_location["place_item"])
                 place_messages.append('", "'.join(manual_location["place_item"]))
 
             if manual_location.get("place_item_category"):
-                eligible_item_names += [i["name"] for i in item_name_to_item.values() if "category" in i and set(i["category"]).intersection(manual_location["place_item_category"])]
+                eligible_item_names.update(self.get_item_names_in_categories(manual_location["place_item_category"]))
                 place_messages.append('", "'.join(manual_location["place_item_category"]) + " category(ies)")
 
             # Second we check for forbidden items names
             if manual_location.get("dont_place_item"):
-                forbidden_item_names += manual_location["dont_place_item"]
+                forbidden_item_names.update(manual_location["dont_place_item"])
                 forbid_messages.append('", "'.join(manual_location["dont_place_item"]) + ' items')
 
             if manual_location.get("dont_place_item_category"):
-                forbidden_item_names += [i["name"] for i in item_name_to_item.values() if "category" in i and set(i["category"]).intersection(manual_location["dont_place_item_category"])]
+                forbidden_item_names.update(self.get_item_names_in_categories(manual_location["dont_place_item_category"]))
                 forbid_messages.append('", "'.join(manual_location["dont_place_item_category"]) + ' category(ies)')
 
             # If we forbid some names, check for those in the possible names and remove them
-            if forbidden_item_names:
-                eligible_item_names = [name for name in eligible_item_names if name not in forbidden_item_names]
+            eligible_item_names -= forbidden_item_names
 
             if eligible_item_names:
-                eligible_items = [item for item in self.multiworld.itempool if item.player == self.player and item.name in eligible_item_names]
+                # sorted by pool position so the random choice below matches a plain scan of the itempool
+                eligible_indexes = sorted(index for name in eligible_item_names for index in pool_index.get(name, []) if index not in placed_indexes)
+                eligible_items = [player_pool[index] for index in eligible_indexes]
 
             if len(eligible_items) == 0:
                 nl = "\n"
@@ -358,20 +414,44 @@ class ManualWorld(World):
                     raise Exception(f'Could not find a suitable item to place at "{manual_location["name"]}".\n    No items that match "{f"{nl}     or ".join(place_messages)}"\n    Maybe because of forbidden "{f"{nl}     or ".join(forbid_messages)}"')
                 raise Exception(f'Could not find a suitable item to place at "{manual_location["name"]}". \n    No items that match "{f"{nl}     or ".join(place_messages)}"')
 
-            item_to_place = self.random.choice(eligible_items)
+            chosen_index = self.random.choice(eligible_indexes)
+            item_to_place = player_pool[chosen_index]
             location.place_locked_item(item_to_place)
+            placed_indexes.add(chosen_index)
 
-            # remove the item we're about to place from the pool so it isn't placed twice
-            self.multiworld.itempool.remove(item_to_place)
-
+        # remove the items we placed from the pool so they aren't placed twice
+        if placed_indexes:
+            self.remove_from_itempool([player_pool[index] for index in placed_indexes])
 
         after_generate_basic(self, self.multiworld, self.player)
+        self.item_index.sync_precollected(self.multiworld.precollected_items.get(self.player, []))
 
         # Enable this in Meta.json to generate a diagram of your manual.  Only works on 0.4.4+
         if enable_region_diagram:
             from Utils import visualize_regions
             visualize_regions(self.multiworld.get_region("Menu", self.player), f"{self.game}_{self.player}.puml")
 
+    def remove_from_itempool(self, items: Iterable[Item]):
+        """Removes these exact items of this player from the multiworld itempool, in place.\n
+        The search starts at the end of where create_items appended this player's pool and walks back, so other players' items are only looked at if ours moved past them."""
+        itempool = self.multiworld.itempool
+        remaining = {id(item) for item in items}
+        end = min(self.pool_end, len(itempool))
+        for index in range(end - 1, -1, -1):
+            if id(itempool[index]) in remaining:
+                remaining.discard(id(itempool[index]))
+                del itempool[index]
+                end -= 1
+                if not remaining:
+                    return
+
+        for index in range(len(itempool) - 1, end - 1, -1):
+            if id(itempool[index]) in remaining:
+                remaining.discard(id(itempool[index]))
+                del itempool[index]
+                if not remaining:
+                    return
+
     def pre_fill(self):
         # DataValidation after all the hooks are done but before fill
         runPreFillDataValidation(self, self.multiworld)
@@ -386,6 +466,13 @@ class ManualWorld(World):
                 continue
             slot_data[option_key] = get_option_value(self.multiworld, self.player, option_key)
 
+        # the client's local logic can't run the connections hook, so it gets the connections generation ended up with
+        region_names = {region.name for region in self.multiworld.get_regions(self.player)}
+        slot_data["region_connections"] = {region: [connected for connected in connections if connected in region_names]
+                                           for region, connections in self.region_connections.items() if region in region_names}
+        # and the progression item counts generation resolved "all", "half" and percentage counts from
+        slot_data["item_counts"] = dict(self.get_item_counts(only_progression=True))
+
         slot_data = after_fill_slot_data(slot_data, self, self.multiworld, self.player)
 
         return slot_data
@@ -421,6 +508,86 @@ class ManualWorld(World):
     The maximum time a location/region's requirement can loop to check for functions\n
     One thing to remember is the more you loop the longer generation will take. So probably leave it as is unless you really needs it."""
 
+    def pick_starting_items(self, pool: list[Item]) -> tuple[list[Item], list[Item]]:
+        """Pushes the items picked by the starting_items blocks of game.json as precollected, and returns (the pool without them, the items started).\n
+        Picks the same items from the same random draws as removing each one from the pool with pool.remove() would,
+        but the pool is only rebuilt once at the end."""
+        items_started: list[Item] = []
+        if not starting_items:
+            return pool, items_started
+
+        started_item_names: set[str] = set()
+        pool = list(pool)
+        removed: list[bool] = []
+        # where the remaining copies of each item name are in the pool, last first, since pool.remove() takes out the first equal item
+        remaining_by_name: dict[str, list[int]] = {}
+
+        def index_pool():
+            removed[:] = [False] * len(pool)
+            remaining_by_name.clear()
+            for index in range(len(pool) - 1, -1, -1):
+                remaining_by_name.setdefault(pool[index].name, []).append(index)
+
+        index_pool()
+
+        for starting_item_block in starting_items:
+            if not resolve_yaml_option(self.multiworld, self.player, starting_item_block):
+                continue
+            # if there's a condition on having a previous item, check for any of them
+            # if not found in items started, this starting item rule shouldn't execute, and check the next one
+            if "if_previous_item" in starting_item_block:
+                if started_item_names.isdisjoint(starting_item_block["if_previous_item"]):
+                    continue
+
+            # start with the full pool of items
+            eligible_names = None
+
+            # if the setting lists specific item names, limit the items to just those
+            if "items" in starting_item_block:
+                eligible_names = set(starting_item_block["items"])
+
+            # if the setting lists specific item categories, limit the items to ones that have any of those categories
+            if "item_categories" in starting_item_block:
+                eligible_names = self.get_item_names_in_categories(starting_item_block["item_categories"])
+
+            if eligible_names is None:
+                # the whole pool gets shuffled in place, which changes the order every later block sees
+                pool[:] = [item for index, item in enumerate(pool) if not removed[index]]
+                self.random.shuffle(pool)
+
+                if "random" not in starting_item_block:
+                    # starting items are removed from the pool while looping over that same pool, which skips every other item
+                    for starting_item in pool:
+                        items_started.append(starting_item)
+                        self.multiworld.push_precollected(starting_item)
+                        started_item_names.add(starting_item.name)
+                        pool.remove(starting_item)
+                    index_pool()
+                    continue
+
+                index_pool()
+                items = list(pool)
+            else:
+                items = [item for index, item in enumerate(pool) if not removed[index] and item.name in eligible_names]
+                self.random.shuffle(items)
+
+            # if the setting lists a specific number of random items that should be pulled, only use a subset equal to that number
+            if "random" in starting_item_block:
+                items = items[0:starting_item_block["random"]]
+
+            for starting_item in items:
+                items_started.append(starting_item)
+                self.multiworld.push_precollected(starting_item)
+                started_item_names.add(starting_item.name)
+                removed[remaining_by_name[starting_item.name].pop()] = True
+
+        pool = [item for index, item in enumerate(pool) if not removed[index]]
+        return pool, items_started
+
+    def get_item_names_in_categories(self, categories: list[str]) -> set[str]:
+        """Returns the names of every item that has at least one of the given categories."""
+        return {name for category in categories for name in self.item_name_groups.get(category, [])}
+
     def add_filler_items(self, item_pool, traps):
         Utils.deprecate("Use adjust_filler_items instead.")
         return self.adjust_filler_items(item_pool, traps)
@@ -436,13 +603,9 @@ class ManualWorld(World):
             trap_count = extras * trap_percent // 100
             filler_count = extras - trap_count
 
-            for _ in range(0, trap_count):
-                extra_item = self.create_item(self.random.choice(traps))
-                item_pool.append(extra_item)
-
-            for _ in range(0, filler_count):
-                extra_item = self.create_item(self.get_filler_item_name())
-                item_pool.append(extra_item)
+            # one draw per item, exactly like creating them one by one did, so seeds generate the same pool
+            item_pool.extend(self.create_item_sequence([self.random.choice(traps) for _ in range(trap_count)]))
+            item_pool.extend(self.create_item_sequence([self.get_filler_item_name() for _ in range(filler_count)]))
         elif extras < 0:
             logging.warning(f"{self.game} has more items than locations. {abs(extras)} non-progression items will be removed at random.")
             # Filler is only assigned if the item doesn't have any other tags, so it only has to be covered by itself.
@@ -14,11 +14,12 @@ from ..Data import game_table, item_table, location_table, region_table
 # These helper methods allow you to determine if an option has been set, or what its value is, for any player in the multiworld
 from ..Helpers import is_option_enabled, get_option_value, format_state_prog_items_key, ProgItemsCat, is_location_name_enabled, is_item_name_enabled, clamp
 
+# @passthrough_hook marks a hook that just returns its first argument, so Manual can skip calling it. Remove it when you add code to that hook
+from ..Helpers import passthrough_hook
+
 # calling logging.info("message") anywhere below in this file will output the message to both console and log file
 import logging
 
-import random
-
 ########################################################################################
 ## Order of method calls when the world generates:
 ##    1. create_regions - Creates regions and locations
@@ -42,6 +43,23 @@ def hook_get_filler_item_name(world: World, multiworld: MultiWorld, player: int)
 def before_create_regions(world: World, multiworld: MultiWorld, player: int):
     pass
 
+# Called before the regions are connected. connections maps each region name to the names of the regions it connects to, starting from
+# every connects_to in regions.json plus "Manual" connecting to the starting regions. Only the connections returned here are created.
+def before_create_region_connections(connections: dict[str, list[str]], world: World, multiworld: MultiWorld, player: int) -> dict[str, list[str]]:
+    chapters = {region_name for region_name in connections if region_name.startswith("Chapter ")}
+
+    if get_option_value(multiworld, player, "linear_mode"):
+        # in linear mode, chapters unlock one after the other from Chapter 1, and the hub only opens up from Chapter 2
+        connections["Manual"] = [region_name for region_name in connections["Manual"] if region_name != "Hub"]
+        connections["Hub"] = [region_name for region_name in connections["Hub"] if region_name not in chapters and region_name != "Final Boss"]
+    else:
+        # in non-linear mode, the hub is the starting region and connects to every chapter and the final boss on its own
+        connections["Manual"] = [region_name for region_name in connections["Manual"] if region_name != "Chapter 1"]
+        for chapter in chapters:
+            connections[chapter] = []
+
+    return connections
+
 # Called after regions and locations are created, in case you want to see or modify that information. Victory location is included.
 def after_create_regions(world: World, multiworld: MultiWorld, player: int):
     # Use this hook to remove locations from the world
@@ -49,57 +67,13 @@ def after_create_regions(world: World, multiworld: MultiWorld, player: int):
 
     # Add your code here to calculate which locations to remove
 
-    for region in multiworld.regions:
-        if region.player == player:
-            for location in list(region.locations):
-                if location.name in locationNamesToRemove:
-                    region.locations.remove(location)
+    for region in multiworld.get_regions(player):
+        for location in list(region.locations):
+            if location.name in locationNamesToRemove:
+                region.locations.remove(location)
     if hasattr(multiworld, "clear_location_cache"):
         multiworld.clear_location_cache()
 
-    # in non-linear mode, we need to make the hub the new starting region and connect it to all chapters
-    if get_option_value(multiworld, player, "linear_mode"):
-        # get rid of the chapter exits in Hub and the hub entrances in the chapters
-       
-        # in linear mode, start by removing the connection between "Manual" and "Hub"
-        hub = multiworld.get_region("Hub", player)
-        manual = multiworld.get_region("Manual", player)
-        manual.exits = [exit for exit in manual.exits if "Hub" not in exit.name]
-        hub.entrances = [entrance for entrance in hub.entrances if "Manual" not in entrance.name.split("To")[0]]
-        
-        # remove the hub link from final boss
-        hub.exits = [exit for exit in hub.exits if "Final Boss" not in exit.name]
-        boss = multiworld.get_region("Final Boss", player)
-        boss.entrances = [entrance for entrance in boss.entrances if "Hub" not in entrance.name]
-
-        # then the connections between "Hub" and the numbered chapters
-        hub.exits = [exit for exit in hub.exits if "Chapter" not in exit.name.split("To", 2)[1]]
-        for region in multiworld.regions:
-            if region.player == player and "Chapter" in region.name:
-                region.entrances = [enter for enter in region.entrances if "Hub" not in enter.name.split("To")[0]]
-    else:
-        # in nonlinear mode, start by removing the connection between "Manual" and "Chapter 1"
-        hub = multiworld.get_region("Hub", player)
-        chap_1 = multiworld.get_region("Chapter 1", player)
-        manual = multiworld.get_region("Manual", player)
-        manual.exits = [exit for exit in manual.exits if "Chapter 1" not in exit.name.split("To", 2)[1]]
-        chap_1.entrances = [entrance for entrance in chap_1.entrances if "Manual" not in entrance.name.split("To")[0] and "Final Boss" not in entrance.name]
-
-        # remove the chapter 16 link from final boss
-        #c_16 = multiworld.get_region("Chapter 16", player)
-        #c_16.exits = [exit for exit in c_16.exits if "Final Boss" not in exit.name]
-        boss = multiworld.get_region("Final Boss", player)
-        boss.entrances = [entrance for entrance in boss.entrances if "Chapter 1" not in entrance.name]
-
-        # then the connections between each set of numbered chapters
-        hub.entrances = [enter for enter in hub.entrances if "Chapter" not in enter.name.split("To", 2)[0]]
-        for region in multiworld.regions:
-            if region.player == player and "Chapter" in region.name:
-                region.exits = [exit for exit in region.entrances if "Chapter" not in exit.name.split("To", 2)[1] and "Hub" not in exit.name.split("To", 2)[1]]
-                region.entrances = [enter for enter in region.entrances if "Chapter" not in enter.name.split("To", 2)[0]]
-
-
-
 # This hook allows you to access the item names & counts before the items are created. Use this to increase/decrease the amount of a specific item in the pool
 # Valid item_config key/values:
 # {"Item Name": 5} <- This will create qty 5 items using all the default settings
@@ -130,6 +104,7 @@ def before_create_items_starting(item_pool: list, world: World, multiworld: Mult
     total_chapters_in_pool = min(16 + extraChapterCount, get_option_value(multiworld, player, "chapters_in_pool"))
 
     chapters = []
+    world.removed_chapter_location_names = set()
     
     # for linear mode, get the regions and remove all locations in them
     if (get_option_value(multiworld, player, "linear_mode")):
@@ -148,11 +123,12 @@ def before_create_items_starting(item_pool: list, world: World, multiworld: Mult
         numChaptersToRemove = 16 + extraChapterCount - total_chapters_in_pool
         chapterItemNamesToRemove = []
         chapterItemNames = [item["name"] for item in item_table if "category" in item and "Chapter" in item.get("category") and is_item_name_enabled(multiworld,player,item.get("name"))]
-        random.shuffle(chapterItemNames)
+        world.random.shuffle(chapterItemNames)
         for i in range(numChaptersToRemove):
             chapterItemNamesToRemove.append(chapterItemNames[i])
             chapterLocation = next(l for l in location_table if l["name"] == chapterItemNames[i])
-            chapterLocation["removed"] = True
+            # kept on the world rather than flagged in location_table, which is shared by every player and every generation
+            world.removed_chapter_location_names.add(chapterLocation["name"])
 
             chapters.append(multiworld.get_region(chapterLocation["region"], player))
             itemNamesToRemove.append("Map of Arkus Fragment")
@@ -263,13 +239,14 @@ def before_create_items_filler(item_pool: list, world: World, multiworld: MultiW
             logging.warning(f"{world.player_name} thought setting all trap weights to 0 would be funny. They won't be laughing for long.")
             weights[-1] = 1
 
-        for _ in range(0, trap_count):
-            extra_item = world.create_item(world.random.choices(traps,weights=weights)[0])
-            item_pool.append(extra_item)
+        # draw every trap and filler name first, then let the world create them in the same order, resolving each name once.
+        # a weighted choices() call draws k names the same way as k calls of k=1, but choices() without weights
+        # doesn't draw like choice(), so fillers still use choice() to keep seeds generating the same pool
+        trap_names = world.random.choices(traps, weights=weights, k=trap_count) if trap_count > 0 else []
+        item_pool.extend(world.create_item_sequence(trap_names))
 
-        for _ in range(0, filler_count):
-            extra_item = world.create_item(world.random.choice(filler))
-            item_pool.append(extra_item)
+        filler_names = [world.random.choice(filler) for _ in range(filler_count)]
+        item_pool.extend(world.create_item_sequence(filler_names))
 
     return item_pool
 
@@ -294,13 +271,13 @@ def after_create_items(item_pool: list, world: World, multiworld: MultiWorld, pl
         total_required_fragments = min(16 + extraChapterCount, get_option_value(multiworld, player, "chapters_in_pool"), get_option_value(multiworld, player, "chapters_to_beat"))
         
         core_frags = [i for i in item_pool if i.name == "Map of Arkus Fragment"]
-        random.shuffle(core_frags)
+        world.random.shuffle(core_frags)
         bonus_core_frag_count = len(core_frags) - clamp(total_required_fragments, 1, len(core_frags))
         for i in range(bonus_core_frag_count):
             core_frags[i].classification = ItemClassification.useful
 
         for location in location_table:
-            if "removed" not in location and "Level Completion" in location["category"] and is_location_name_enabled(multiworld,player,location["name"]): 
+            if location["name"] not in world.removed_chapter_location_names and "Level Completion" in location["category"] and is_location_name_enabled(multiworld,player,location["name"]): 
                 level = multiworld.get_location(location["name"], player)       # if the chapter was already removed, the location table doesn't reflect that
                 item_to_place = next(i for i in item_pool if i.name == "Map of Arkus Fragment")
                 level.place_locked_item(item_to_place)
@@ -308,7 +285,7 @@ def after_create_items(item_pool: list, world: World, multiworld: MultiWorld, pl
     # otherwise, make the extra progressive chapters into useful items (this seems to skyrocket the failure rate)
     #else:
         #prog_chapters = [i for i in item_pool if i.name == "Progressive Chapter"]
-        #random.shuffle(prog_chapters)
+        #world.random.shuffle(prog_chapters)
         #for i in range(2):
         #    prog_chapters[i].classification = ItemClassification.useful
     
@@ -317,7 +294,7 @@ def after_create_items(item_pool: list, world: World, multiworld: MultiWorld, pl
     #    total_story_chapters = min(22, get_option_value(multiworld, player, "chapters_in_pool"), get_option_value(multiworld, player, "chapters_to_beat")) - extraChapterCount
     #
     #    prog_chapters = [i for i in item_pool if i.name == "Progressive Chapter"]
-    #    random.shuffle(prog_chapters)
+    #    world.random.shuffle(prog_chapters)
     #    print(len(prog_chapters))
     #    bonus_chapter_count = len(prog_chapters) - clamp(total_story_chapters, 1, len(prog_chapters))
     #    for i in range(bonus_chapter_count):
@@ -328,7 +305,7 @@ def after_create_items(item_pool: list, world: World, multiworld: MultiWorld, pl
         all_skylanders = [item for item in item_table if "category" in item and "Skylander" in item.get("category") and is_item_name_enabled(multiworld,player,item.get("name"))]
         print(len(item_table))
         print(len(all_skylanders))
-        random.shuffle(all_skylanders)
+        world.random.shuffle(all_skylanders)
         skylanders = [[]]
         skylanders.append([item for item in all_skylanders if "Skylander - Fire" in item.get("category")])
         skylanders.append([item for item in all_skylanders if "Skylander - Water" in item.get("category")])
@@ -346,6 +323,31 @@ def after_create_items(item_pool: list, world: World, multiworld: MultiWorld, pl
 
     return item_pool
 
+# Called after the item pool is created and before any rules are set. Return the names of the regions to remove from the world.
+# The regions are removed along with their locations and every entrance/exit that touches them, so no rules are ever built for them.
+def hook_get_regions_to_prune(world: World, multiworld: MultiWorld, player: int) -> list[str]:
+    chaptersToRemove = []
+
+    if (get_option_value(multiworld, player, "linear_mode")):
+        
+        extraChapterCount = (get_option_value(multiworld, player, "include_empire") + 
+                           get_option_value(multiworld, player, "include_ship") + 
+                           get_option_value(multiworld, player, "include_crypt") + 
+                           get_option_value(multiworld, player, "include_peak"))
+        
+        chapters = [region for region in multiworld.get_regions(player) if "Chapter" in region.name]    # should always have a size of 16
+
+        for chapter in chapters:
+            if int(chapter.name.split(" ")[1]) > min(16 + extraChapterCount, 
+                                                     get_option_value(multiworld, player, "chapters_in_pool")) - extraChapterCount:
+                chaptersToRemove.append(chapter.name)
+    else:
+        chapterLocations = [l for l in location_table if l["name"] in world.removed_chapter_location_names]
+        
+        chaptersToRemove.extend(chapterLocation["region"] for chapterLocation in chapterLocations)
+
+    return chaptersToRemove
+
 # Called before rules for accessing regions and locations are created. Not clear why you'd want this, but it's here.
 def before_set_rules(world: World, multiworld: MultiWorld, player: int):
     pass
@@ -369,40 +371,20 @@ def after_set_rules(world: World, multiworld: MultiWorld, player: int):
     # location.access_rule = lambda state: old_rule(state) and Example_Rule(state)
     # OR
     # location.access_rule = lambda state: old_rule(state) or Example_Rule(state)
-
-    # we have to remove chapters here because it fails if you do it any earlier
-    chaptersToRemove = []
-
-    if (get_option_value(multiworld, player, "linear_mode")):
-        
-        extraChapterCount = (get_option_value(multiworld, player, "include_empire") + 
-                           get_option_value(multiworld, player, "include_ship") + 
-                           get_option_value(multiworld, player, "include_crypt") + 
-                           get_option_value(multiworld, player, "include_peak"))
-        
-        chapters = [region for region in multiworld.regions if region.player == player and "Chapter" in region.name]    # should always have a size of 16
-
-        for chapter in chapters:
-            if int(chapter.name.split(" ")[1]) > min(16 + extraChapterCount, 
-                                                     get_option_value(multiworld, player, "chapters_in_pool")) - extraChapterCount:
-                chaptersToRemove.append(chapter)
-    else:
-        chapterLocations = [l for l in location_table if "removed" in l.keys()]
-        
-        chaptersToRemove.extend(multiworld.get_region(chapterLocation["region"], player) for chapterLocation in chapterLocations)
-
-    for region in chaptersToRemove:                 
-        del(multiworld.regions.region_cache[player][region.name])
+    pass
 
 # The item name to create is provided before the item is created, in case you want to make changes to it
+@passthrough_hook
 def before_create_item(item_name: str, world: World, multiworld: MultiWorld, player: int) -> str:
     return item_name
 
 # The item that was created is provided after creation, in case you want to modify the item
+@passthrough_hook
 def after_create_item(item: ManualItem, world: World, multiworld: MultiWorld, player: int) -> ManualItem:
     return item
 
 # This method is run towards the end of pre-generation, before the place_item options have been handled and before AP generation occurs
+# If you add or remove this player's items from the pool here (or in after_generate_basic), also do it in world.item_index (add/remove)
 def before_generate_basic(world: World, multiworld: MultiWorld, player: int):
     pass
 
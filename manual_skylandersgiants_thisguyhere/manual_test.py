@@ -1,6 +1,183 @@
+import random
+import sys
+import unittest
+from unittest.mock import patch
+
+from BaseClasses import Location, MultiWorld, Region
+from NetUtils import NetworkItem
 from test.TestBase import WorldTestBase
-from .Game import game_name
+from test.general import setup_solo_multiworld
+from worlds.AutoWorld import AutoWorldRegister
+from .Game import game_name, starting_items
+from .Helpers import filter_used_regions, resolve_yaml_option
+from .RegionGraph import RegionGraph
+from .Regions import prune_regions
 
 
 class ManualTest(WorldTestBase):
     game = game_name
+
+
+class ManualDeterminismTest(unittest.TestCase):
+    seed = 20241019
+
+    def generate_snapshot(self) -> dict:
+        """Generate a solo seed and keep everything the hooks can randomize, as plain names so two runs can be compared"""
+        multiworld = setup_solo_multiworld(AutoWorldRegister.world_types[game_name], seed=self.seed)
+        player = 1
+        return {
+            "precollected": sorted(item.name for item in multiworld.precollected_items[player]),
+            "itempool": [(item.name, int(item.classification)) for item in multiworld.itempool if item.player == player],
+            "regions": sorted(region.name for region in multiworld.get_regions(player)),
+            "placements": {location.name: location.item.name for location in multiworld.get_locations(player) if location.item},
+        }
+
+    def test_same_seed_generates_same_world(self):
+        first = self.generate_snapshot()
+        second = self.generate_snapshot()
+
+        for key in first:
+            with self.subTest(key):
+                self.assertEqual(first[key], second[key])
+
+
+class ManualStartingItemsTest(unittest.TestCase):
+    seed = 20241019
+
+    @staticmethod
+    def pick_with_pool_remove(world, pool: list, blocks: list) -> tuple[list, list]:
+        """The original starting_items loop, which removed each started item with pool.remove()"""
+        items_started = []
+        for starting_item_block in blocks:
+            if not resolve_yaml_option(world.multiworld, world.player, starting_item_block):
+                continue
+            if "if_previous_item" in starting_item_block:
+                if not [item for item in items_started if item.name in starting_item_block["if_previous_item"]]:
+                    continue
+
+            items = pool
+            if "items" in starting_item_block:
+                items = [item for item in pool if item.name in starting_item_block["items"]]
+            if "item_categories" in starting_item_block:
+                items_in_categories = [item["name"] for item in world.item_name_to_item.values()
+                                       if set(starting_item_block["item_categories"]).intersection(item.get("category", []))]
+                items = [item for item in pool if item.name in items_in_categories]
+
+            world.random.shuffle(items)
+            if "random" in starting_item_block:
+                items = items[0:starting_item_block["random"]]
+
+            for starting_item in items:
+                items_started.append(starting_item)
+                pool.remove(starting_item)
+        return pool, items_started
+
+    def assert_same_picks(self, blocks: list):
+        multiworld = setup_solo_multiworld(AutoWorldRegister.world_types[game_name], seed=self.seed)
+        world = multiworld.worlds[1]
+        pool = [item for item in multiworld.itempool if item.player == world.player]
+
+        world.random = random.Random(self.seed)
+        expected_pool, expected_started = self.pick_with_pool_remove(world, list(pool), blocks)
+        world.random = random.Random(self.seed)
+        with patch.object(sys.modules[type(world).__module__], "starting_items", blocks):
+            picked_pool, picked_started = world.pick_starting_items(list(pool))
+
+        self.assertEqual([item.name for item in expected_started], [item.name for item in picked_started])
+        self.assertEqual([item.name for item in expected_pool], [item.name for item in picked_pool])
+
+    def test_same_seed_starts_same_items(self):
+        self.assert_same_picks(starting_items or [])
+
+    def test_unfiltered_random_block(self):
+        self.assert_same_picks([{"random": 3}, {"random": 2}])
+
+    def test_unfiltered_block_without_random(self):
+        self.assert_same_picks([{"random": 2}, {}])
+
+class ManualRegionGraphTest(unittest.TestCase):
+    # Menu -> A <-> B, C -> B, D is on its own
+    graph = RegionGraph({"Menu": ["A"], "A": ["B"], "B": ["A"], "C": ["B"], "D": []})
+
+    def test_reachable_from(self):
+        self.assertEqual({"Menu", "A", "B"}, self.graph.reachable_from(["Menu"]))
+        self.assertEqual({"A", "B", "D"}, self.graph.reachable_from(["B", "D"]))
+        self.assertEqual(set(), self.graph.reachable_from(["Missing"]))
+
+    def test_unreachable_from(self):
+        self.assertEqual({"C", "D"}, self.graph.unreachable_from(["Menu"]))
+        self.assertEqual(set(), self.graph.unreachable_from(["Menu", "C", "D"]))
+
+    def test_ancestors_of(self):
+        self.assertEqual({"Menu", "A", "B", "C"}, self.graph.ancestors_of(["B"]))
+        self.assertEqual({"D"}, self.graph.ancestors_of(["D"]))
+
+    def test_create_regions_leaves_only_reachable_regions(self):
+        multiworld = setup_solo_multiworld(AutoWorldRegister.world_types[game_name], ("generate_early", "create_regions"))
+        world = multiworld.worlds[1]
+        region_names = {region.name for region in multiworld.get_regions(world.player)}
+
+        self.assertEqual(region_names, world.region_graph.region_names)
+        self.assertEqual(set(), world.region_graph.unreachable_from(["Menu"]))
+
+    def test_prune_regions(self):
+        multiworld = setup_solo_multiworld(AutoWorldRegister.world_types[game_name], ("generate_early", "create_regions"))
+        world = multiworld.worlds[1]
+        manual = multiworld.get_region("Manual", world.player)
+        orphan = Region("Orphan", world.player, multiworld)
+        orphan.locations.append(Location(world.player, "Orphan Location", None, orphan))
+        multiworld.regions += [orphan]
+        orphan.connect(manual, "OrphanToManual")
+
+        prune_regions(world, multiworld, world.player, ["Orphan"])
+
+        self.assertNotIn("Orphan", {region.name for region in multiworld.get_regions(world.player)})
+        self.assertNotIn("OrphanToManual", {entrance.name for entrance in manual.entrances})
+        self.assertRaises(KeyError, multiworld.get_location, "Orphan Location", world.player)
+
+    def test_filter_used_regions(self):
+        multiworld = MultiWorld(1)
+        menu, hub, leaf, dead_end = (Region(name, 1, multiworld) for name in ("Menu", "Hub", "Leaf", "Dead End"))
+        leaf.locations.append(Location(1, "Leaf Location", None, leaf))
+        menu.connect(hub)
+        hub.connect(leaf)
+        hub.connect(dead_end)
+
+        self.assertEqual({menu, hub, leaf}, filter_used_regions([menu, hub, leaf, dead_end]))
+
+
+class ManualClientLocalLogicTest(unittest.IsolatedAsyncioTestCase):
+    def create_context(self):
+        from .ManualClient import ManualContext
+        from .Regions import regionMap
+
+        world = AutoWorldRegister.world_types[game_name]
+        ctx = ManualContext(None, None, game_name, "Player")
+        ctx.item_table = world.item_name_to_item
+        ctx.location_table = world.location_name_to_location
+        ctx.region_table = {name: region for name, region in regionMap.items() if name != "Manual"}
+        ctx.update_data_package({"games": {game_name: {"item_name_to_id": world.item_name_to_id,
+                                                       "location_name_to_id": world.location_name_to_id, "checksum": "test"}}})
+        ctx.build_local_logic({"region_connections": {name: list(region.get("connects_to") or []) for name, region in regionMap.items()}})
+        return ctx
+
+    async def test_later_packets_keep_earlier_items(self):
+        ctx = self.create_context()
+        empty_reachable = set(ctx.local_logic.reachable_locations)
+
+        def puts_more_in_logic(item_name: str) -> bool:
+            changed = ctx.local_logic.add_items([item_name])
+            ctx.local_logic.reset()
+            return bool(changed)
+
+        first_id = next(item_id for item_name, item_id in ctx.item_names_to_id.items() if puts_more_in_logic(item_name))
+
+        ctx.items_received.append(NetworkItem(first_id, 0, 1, 0))
+        ctx.update_received_item_counts()
+        first_reachable = set(ctx.local_logic.reachable_locations)
+        self.assertTrue(first_reachable > empty_reachable)
+
+        other_id = next(item_id for item_id in ctx.item_names_to_id.values() if item_id != first_id)
+        ctx.items_received.append(NetworkItem(other_id, 0, 1, 0))
+        ctx.update_received_item_counts()
+        self.assertTrue(first_reachable <= ctx.local_logic.reachable_locations)